@@ -0,0 +1,237 @@
+"""Benchmarks for the load, render and paint hot paths.
+
+Runs headless (offscreen Qt) against synthetic NIfTI volumes and grids:
+
+    uv run python benchmarks/run.py --sizes 128 256 --points 1000 100000 --save baseline.json
+    uv run python benchmarks/run.py --compare baseline.json
+
+Each case is timed over `--repeat` runs (median and min wall time) and
+then run once more under tracemalloc for its peak traced memory. With
+`--compare`, cases whose min time or peak memory exceeds the baseline by
+more than `--threshold` are flagged and the exit status is 1; the min is
+compared because the median of a few runs moves by 25% between
+back-to-back runs of the same code.
+
+Paint cases `repaint()` shown widgets. `grab()` on a hidden widget sends
+it a resize first, so it would time the re-layout and not the paint.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import nibabel as nib
+import numpy as np
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from tractviewer.cache import VolumeCache
+from tractviewer.io import load_mri
+from tractviewer.ui.grid import GridWidget
+from tractviewer.ui.mri import MRIView
+from tractviewer.utils import numpy_to_qimage
+
+
+def make_volume(root: Path, size: int) -> tuple[Path, Path]:
+    """Write a size³ int16 volume as .nii and .nii.gz; returns both paths."""
+    nii, gz = root / f"vol{size}.nii", root / f"vol{size}.nii.gz"
+    if not nii.exists():
+        rng = np.random.default_rng(size)
+        # smooth-ish data so compression behaves like a real scan
+        x = np.linspace(0, 8 * np.pi, size, dtype=np.float32)
+        base = 400 + 300 * np.sin(x)[:, None, None] * np.cos(x)[None, :, None] * np.sin(x / 2)[None, None, :]
+        data = (base + rng.normal(0, 20, (size, size, size)).astype(np.float32)).astype(np.int16)
+        img = nib.Nifti1Image(data, np.diag([.5, .5, .5, 1]))
+        img.header.set_slope_inter(1.0, 0.0)
+        nib.save(img, nii)
+        nib.save(img, gz)
+    return nii, gz
+
+
+def make_grid(n: int) -> np.ndarray:
+    """n grid points on a half-mm lattice around the origin, in (ml, ap) mm."""
+    side = int(np.ceil(np.sqrt(n)))
+    r, c = np.divmod(np.arange(n), side)
+    return np.stack([(r - side / 2) * .5, (c - side / 2) * .5], axis=1)
+
+
+def volume_cases(root: Path, size: int):
+    nii, gz = make_volume(root, size)
+    cache_dir = root / f"cache{size}"
+
+    def open_nii():
+        vol = load_mri(nii)
+        vol[size // 2]
+
+    def open_gz_cold():
+        VolumeCache(cache_dir).clear()
+        os.environ['TRACTVIEWER_CACHE_DIR'] = str(cache_dir)
+        load_mri(gz)
+
+    def open_gz_warm():
+        os.environ['TRACTVIEWER_CACHE_DIR'] = str(cache_dir)
+        vol = load_mri(gz)
+        vol[size // 2]
+
+    vol = load_mri(nii)
+    mid = vol[size // 2]
+    view = MRIView(vol)
+    view.resize(800, 800)
+    view.set_column(size // 2)
+    view.set_brightness_contrast(400, 800)
+    view.show()
+    QtWidgets.QApplication.processEvents()
+
+    # without the read-ahead ring, which would otherwise answer from its buffer
+    view.read_ahead.reset()
+
+    def update_image():
+        view.slice_cache.clear()
+        view.update_image(sync=True)
+
+    view.update_image(sync=True)
+
+    def paint():
+        view.repaint()
+
+    # a shown 4K view, so rubber-band moves repaint only what they damage
+    drag_view = MRIView(vol)
+    drag_view.resize(3840, 2160)
+    drag_view.set_column(size // 2)
+    drag_view.set_brightness_contrast(400, 800)
+    drag_view.show()
+    drag_view.update_image(sync=True)
+    start = drag_view._layout().topLeft() + QtCore.QPoint(10, 10)
+    moves = [QtGui.QMouseEvent(QtCore.QEvent.MouseMove, QtCore.QPointF(start + QtCore.QPoint(8 * i, 5 * i)),
+                               QtCore.Qt.LeftButton, QtCore.Qt.LeftButton, QtCore.Qt.NoModifier)
+             for i in range(1, 101)]
+
+    def crop_drag():
+        drag_view.mousePressEvent(QtGui.QMouseEvent(QtCore.QEvent.MouseButtonPress, QtCore.QPointF(start),
+                                                    QtCore.Qt.LeftButton, QtCore.Qt.LeftButton, QtCore.Qt.NoModifier))
+        for e in moves:
+            drag_view.mouseMoveEvent(e)
+            QtWidgets.QApplication.processEvents()
+        drag_view._crop_active = False
+        drag_view._set_crop_rect(None)
+
+    return {
+        f'load_mri[nii,{size}]': open_nii,
+        f'load_mri[gz-cold,{size}]': open_gz_cold,
+        f'load_mri[gz-warm,{size}]': open_gz_warm,
+        f'numpy_to_qimage[{size}]': lambda: numpy_to_qimage(mid, (0, 800)),
+        f'MRIView.update_image[{size}]': update_image,
+        f'MRIView.paintEvent[{size}]': paint,
+        f'MRIView.crop_drag[{size},4k,x100]': crop_drag,
+    }
+
+
+def grid_cases(n: int):
+    grid = GridWidget(make_grid(n))
+    grid.resize(800, 800)
+    grid.show()
+    QtWidgets.QApplication.processEvents()
+    grid.hovered, grid.selected = 0, n - 1
+    rng = np.random.default_rng(n)
+    events = [QtGui.QMouseEvent(QtCore.QEvent.MouseMove, QtCore.QPointF(x, y), QtCore.Qt.NoButton,
+                                QtCore.Qt.NoButton, QtCore.Qt.NoModifier)
+              for x, y in rng.uniform(10, 790, (1000, 2))]
+
+    def hits():
+        for e in events:
+            grid.getHit(e)
+
+    return {
+        f'GridWidget.paintEvent[{n}]': grid.repaint,
+        f'GridWidget.getHit[{n},x1000]': hits,
+    }
+
+
+def measure(fn, repeat: int) -> dict:
+    fn()  # warm up imports, caches and lazily built state
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'median_s': statistics.median(times), 'min_s': min(times), 'peak_mb': peak / 2**20}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Describe every case that regressed past `threshold` times the baseline."""
+    flagged = []
+    for name, cur in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for metric in ('min_s', 'peak_mb'):
+            # ignore noise in tiny numbers
+            floor = 1e-3 if metric == 'min_s' else 1.0
+            if cur[metric] > max(base[metric], floor) * threshold:
+                flagged.append(f"{name}: {metric} {base[metric]:.4g} -> {cur[metric]:.4g}")
+    return flagged
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[128, 256],
+                        help='volume edge lengths (e.g. 128 256 512 1024)')
+    parser.add_argument('--points', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='grid sizes')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', help='run only cases whose name contains this')
+    parser.add_argument('--data', help='directory for the synthetic volumes (default: a temp dir)')
+    parser.add_argument('--save', help='write results to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON to check for regressions')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='flag cases slower or larger than baseline by this factor')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(args.data or tmp)
+        root.mkdir(parents=True, exist_ok=True)
+        cases = {}
+        for size in args.sizes:
+            cases.update(volume_cases(root, size))
+        for n in args.points:
+            cases.update(grid_cases(n))
+        results = {}
+        for name, fn in cases.items():
+            if args.only and args.only not in name:
+                continue
+            results[name] = r = measure(fn, args.repeat)
+            print(f"{name:40s} {r['median_s'] * 1000:10.2f} ms  (min {r['min_s'] * 1000:.2f})"
+                  f"  peak {r['peak_mb']:8.1f} MB", flush=True)
+    app.processEvents()
+    if args.save:
+        meta = {'python': platform.python_version(), 'numpy': np.__version__,
+                'machine': platform.machine(), 'cpus': os.cpu_count()}
+        Path(args.save).write_text(json.dumps({'meta': meta, 'results': results}, indent=2))
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())['results']
+        flagged = compare(results, baseline, args.threshold)
+        for line in flagged:
+            print(f"REGRESSION {line}")
+        return 1 if flagged else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
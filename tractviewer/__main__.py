@@ -1,23 +1,199 @@
 """Small runner that launches the UI.
 
 This module is intentionally minimal; the widgets and IO functions live in
-`tractviewer.ui`, `tractviewer.io` and `tractviewer.utils`.
+`tractviewer.ui`, `tractviewer.io` and `tractviewer.utils`. It is the only
+startup path (`tractviewer.app.main` is the same function). Qt and the
+widgets are imported only once the arguments say a window is wanted, and
+the grid, the volume (and with it nibabel) and the first render are all
+deferred until the window is up.
 """
 
+import time
+
+# baseline of --startup-times; interpreter startup before this is not counted
+_T0 = time.perf_counter()
+
+import argparse
+import os
 import sys
-from PyQt5 import QtWidgets
-from tractviewer.io import load_mri
-from tractviewer.ui.main import MainWindow
 
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='tractviewer')
+    parser.add_argument('path', nargs='?', help='NIfTI volume to open')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='do not read or write the decompressed volume cache')
+    parser.add_argument('--clear-cache', action='store_true',
+                        help='empty the decompressed volume and profile caches and exit')
+    parser.add_argument('--startup-times', action='store_true',
+                        help='print import, first-paint and first-image times to stderr '
+                             '(also TRACTVIEWER_STARTUP_TIMES)')
+    return parser.parse_args(argv)
+
+
+def parse_export_args(argv=None):
+    parser = argparse.ArgumentParser(prog='tractviewer export',
+                                     description='write a PNG of every grid tract')
+    parser.add_argument('path', nargs='?', help='NIfTI volume (default: MRI_PATH or the lab default)')
+    parser.add_argument('--grid', help='plan store (.tplan, newest plan) or tracts .npy '
+                                       '(default: plans.tplan, else tracts.npy, in the repo root)')
+    parser.add_argument('--registration',
+                        help='4x4 grid-to-scanner transform, .txt or .npy (default: registration.txt in the repo root)')
+    parser.add_argument('--out', default='export', help='output directory')
+    parser.add_argument('--brightness', type=float, default=100, help='window center')
+    parser.add_argument('--contrast', type=float, default=200, help='window width')
+    parser.add_argument('--zero', type=int, default=0, help='depth row of the 0 mm tick')
+    parser.add_argument('--scale', type=int, default=2, help='output pixels per voxel')
+    parser.add_argument('--workers', type=int, help='worker processes (default: one per CPU)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='do not read or write the decompressed volume cache')
+    return parser.parse_args(argv)
+
+
+def export_main(argv=None):
+    from tractviewer.export import export_tracts
+    from tractviewer.io import default_mri_path, load_grid, load_registration
+
+    args = parse_export_args(argv)
+    if args.no_cache:
+        os.environ['TRACTVIEWER_NO_CACHE'] = '1'
+    path = args.path or default_mri_path()
+    vlim = (args.brightness - args.contrast / 2.0, args.brightness + args.contrast / 2.0)
+    written, skipped, elapsed = export_tracts(path, load_grid(args.grid), args.out, vlim,
+                                              args.zero, args.scale, args.workers,
+                                              registration=load_registration(args.registration))
+    print(f"Exported {written} images to {args.out} in {elapsed:.2f} s "
+          f"({written / max(elapsed, 1e-9):.1f} images/s)")
+    if skipped:
+        print(f"Skipped {skipped} tracts outside the volume")
+
+
+def parse_plans_args(argv=None):
+    parser = argparse.ArgumentParser(prog='tractviewer plans',
+                                     description='list, import and compare plans in a plan store')
+    parser.add_argument('--store', help='plan store (default: plans.tplan in the repo root)')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list', help='list the plans and their tract counts')
+    imp = sub.add_parser('import', help='add a tracts .npy of (AP, ML) pairs as a plan')
+    imp.add_argument('npy')
+    imp.add_argument('--name', help='plan name (default: the file name)')
+    imp.add_argument('--angle', type=float, default=0.0, help='AP tilt of every tract, degrees')
+    imp.add_argument('--depth', type=float, default=float('nan'), help='planned depth, mm')
+    imp.add_argument('--date', help='planning day, YYYY-MM-DD (default: today)')
+    imp.add_argument('--replace', action='store_true', help='overwrite a plan of the same name')
+    diff = sub.add_parser('diff', help='compare two plans tract by tract')
+    diff.add_argument('a')
+    diff.add_argument('b')
+    return parser.parse_args(argv)
+
+
+def plans_main(argv=None):
+    from pathlib import Path
+    import numpy as np
+    from tractviewer.io import default_plans_path
+    from tractviewer.plans import PlanStore, diff_plans, make_plan
+
+    args = parse_plans_args(argv)
+    path = Path(args.store) if args.store else default_plans_path()
+    if args.command == 'import':
+        store = PlanStore(path) if path.exists() else PlanStore.create(path)
+        tracts = np.load(args.npy)
+        name = args.name or Path(args.npy).stem
+        store.add(name, make_plan(tracts[:, 1], tracts[:, 0], args.angle, args.depth, args.date),
+                  replace=args.replace)
+        print(f"Added {name!r} ({len(tracts)} tracts) to {path}")
+        return
+    store = PlanStore(path)
+    if args.command == 'list':
+        for name in store.names:
+            info = store.info(name)
+            print(f"{name:30s} {info['count']:10d} tracts  created {info['created']}")
+        return
+    a, b = store.plan(args.a), store.plan(args.b)
+    d = diff_plans(a, b)
+    print(f"{args.a} -> {args.b}: {len(d.added)} added, {len(d.removed)} removed, "
+          f"{len(d.common_b)} kept, {len(d.changed)} with a new depth")
+    for label, tracts, idx in (('+', b, d.added), ('-', a, d.removed), ('~', b, d.changed)):
+        for t in tracts[idx[:20]]:
+            print(f"  {label} ml {t['ml']:g}, ap {t['ap']:g}, angle {t['angle']:g}, depth {t['depth']:g}")
+        if len(idx) > 20:
+            print(f"  {label} ... {len(idx) - 20} more")
+
+
+def _startup_report(enabled: bool):
+    """Print `python -X importtime`-style lines of ms since this module was first imported."""
+    def stamp(label: str):
+        if enabled:
+            print(f"startup: {(time.perf_counter() - _T0) * 1000:9.1f} ms | {label}", file=sys.stderr)
+    return stamp
+
+
+def _watch_first_paints(win, stamp):
+    """Stamp the first paint of the window and the first one showing an image."""
+    from PyQt5 import QtCore
+
+    class Watcher(QtCore.QObject):
+        def __init__(self):
+            super().__init__(win)
+            self.window_painted = False
+
+        def eventFilter(self, obj, event):
+            if event.type() == QtCore.QEvent.Paint:
+                if not self.window_painted:
+                    self.window_painted = True
+                    stamp('first paint (window visible)')
+                if obj is win.mri and win.mri._pixmap is not None:
+                    stamp('first image painted')
+                    win.mri.removeEventFilter(self)
+                    win.grid.removeEventFilter(self)
+            return False
+
+    watcher = Watcher()
+    # the grid is the first widget painted; the MRI view reports the first image
+    win.grid.installEventFilter(watcher)
+    win.mri.installEventFilter(watcher)
+    return watcher
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ['export']:
+        export_main(argv[1:])
+        return
+    if argv[:1] == ['plans']:
+        plans_main(argv[1:])
+        return
+    args = parse_args(argv)
+    if args.clear_cache:
+        from tractviewer.cache import VolumeCache
+        from tractviewer.profiles import ProfileCache
+
+        cache = VolumeCache()
+        freed = cache.clear() + ProfileCache().clear()
+        print(f"Cleared {freed / 2**20:.1f} MB from {cache.root}")
+        return
+    if args.no_cache:
+        os.environ['TRACTVIEWER_NO_CACHE'] = '1'
+    stamp = _startup_report(args.startup_times or bool(os.environ.get('TRACTVIEWER_STARTUP_TIMES')))
+    stamp('arguments parsed')
+
+    from PyQt5 import QtCore, QtWidgets
+    stamp('imported PyQt5')
+    from tractviewer.io import default_mri_path
+    from tractviewer.ui.main import MainWindow
+    stamp('imported tractviewer.ui')
 
-def main():
-    app = QtWidgets.QApplication(sys.argv)
+    app = QtWidgets.QApplication(sys.argv[:1])
     win = MainWindow()
-    if len(sys.argv) > 1:
-        path = sys.argv[1]
-        win.load_mri(path)
+    stamp('window built')
+    _watch_first_paints(win, stamp)
     win.show()
+    # without a path, open the default volume if there is one
+    path = args.path
+    if path is None and default_mri_path().exists():
+        path = default_mri_path()
+    if path is not None:
+        QtCore.QTimer.singleShot(0, lambda: win.load_mri(path))
     sys.exit(app.exec_())
 
 
@@ -0,0 +1,149 @@
+"""Persistent on-disk cache of decompressed volumes.
+
+Compressed NIfTI files cannot be memory-mapped, so the first time one is
+opened its raw, reoriented voxels are written to `<key>.npy` next to a
+`<key>.json` sidecar holding the affine and scaling. Later opens map the
+`.npy` directly. Entries are keyed by path, size, mtime and a hash of the
+NIfTI header, and the least recently used ones are evicted once the cache
+grows past its size cap.
+
+The location and cap come from `TRACTVIEWER_CACHE_DIR` and
+`TRACTVIEWER_CACHE_MB`; setting `TRACTVIEWER_NO_CACHE` bypasses it.
+"""
+
+from pathlib import Path
+import hashlib
+import json
+import logging
+import os
+import numpy as np
+
+from tractviewer.volume import ArrayVolume, ProxyVolume
+
+DEFAULT_CACHE_MB = 8192
+
+log = logging.getLogger(__name__)
+
+
+def default_cache_dir() -> Path:
+    root = os.environ.get('TRACTVIEWER_CACHE_DIR')
+    if root:
+        return Path(root)
+    base = os.environ.get('XDG_CACHE_HOME') or os.environ.get('LOCALAPPDATA') or Path.home() / '.cache'
+    return Path(base) / 'tractviewer' / 'volumes'
+
+
+def cache_enabled() -> bool:
+    return not os.environ.get('TRACTVIEWER_NO_CACHE')
+
+
+def cache_key(path: str | Path) -> str:
+    """Key a file by resolved path, size, mtime and header contents."""
+    import nibabel as nib
+
+    path = Path(path).resolve()
+    st = path.stat()
+    header = nib.load(path).header.binaryblock
+    h = hashlib.sha1()
+    h.update(str(path).encode())
+    h.update(f"{st.st_size}:{st.st_mtime_ns}".encode())
+    h.update(hashlib.sha1(header).digest())
+    return h.hexdigest()
+
+
+class VolumeCache:
+    """Directory of memory-mappable `.npy` volumes with LRU eviction."""
+
+    def __init__(self, root: str | Path | None = None, max_mb: float | None = None):
+        self.root = Path(root) if root is not None else default_cache_dir()
+        if max_mb is None:
+            max_mb = float(os.environ.get('TRACTVIEWER_CACHE_MB', DEFAULT_CACHE_MB))
+        self.max_bytes = int(max_mb * 1024 * 1024)
+
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        return self.root / f"{key}.npy", self.root / f"{key}.json"
+
+    def get(self, key: str) -> ArrayVolume | None:
+        """Map a cached volume, or return None on a miss."""
+        npy, meta = self._paths(key)
+        if not (npy.exists() and meta.exists()):
+            return None
+        try:
+            info = json.loads(meta.read_text())
+            arr = np.load(npy, mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        # the sidecar mtime doubles as the last-used time for eviction
+        os.utime(meta)
+        return ArrayVolume(arr, info['slope'], info['inter'], np.asarray(info['affine']))
+
+    def put(self, key: str, volume: ProxyVolume, progress=None) -> ArrayVolume:
+        """Decompress `volume` into the cache and return the mapped copy."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        npy, meta = self._paths(key)
+        tmp = npy.with_suffix('.npy.part')
+        out = np.lib.format.open_memmap(tmp, mode='w+', dtype=volume.raw_dtype, shape=volume.shape)
+        try:
+            volume.read_into(out, progress)
+            out.flush()
+        except BaseException:
+            del out
+            tmp.unlink(missing_ok=True)
+            raise
+        del out
+        os.replace(tmp, npy)
+        affine = None if volume.affine is None else np.asarray(volume.affine).tolist()
+        meta.write_text(json.dumps({'slope': volume.slope, 'inter': volume.inter, 'affine': affine}))
+        self.evict(keep=key)
+        return self.get(key)
+
+    def entries(self) -> list[tuple[float, int, str]]:
+        """(last used, size in bytes, key) for every entry, oldest first."""
+        out = []
+        for meta in self.root.glob('*.json'):
+            npy = meta.with_suffix('.npy')
+            try:
+                out.append((meta.stat().st_mtime, npy.stat().st_size, meta.stem))
+            except OSError:
+                continue
+        return sorted(out)
+
+    def remove(self, key: str) -> bool:
+        """Delete entry `key`; False if it is in use and was left in place.
+
+        Windows refuses to delete a file that is memory-mapped, e.g. by a
+        viewer that has the volume open. The `.npy` goes first, so a failed
+        removal leaves the whole entry behind rather than half of it.
+        """
+        for p in self._paths(key):
+            try:
+                p.unlink(missing_ok=True)
+            except OSError as e:
+                log.warning("cache entry %s is in use, not removed: %s", p, e)
+                return False
+        return True
+
+    def evict(self, keep: str | None = None):
+        """Drop least recently used entries until the cache fits its cap."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in entries:
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            if self.remove(key):
+                total -= size
+
+    def clear(self) -> int:
+        """Remove every entry and return the number of bytes freed."""
+        freed = 0
+        for _, size, key in self.entries():
+            if self.remove(key):
+                freed += size
+        for tmp in self.root.glob('*.part'):
+            try:
+                tmp.unlink(missing_ok=True)
+            except OSError as e:
+                log.warning("cache file %s is in use, not removed: %s", tmp, e)
+        return freed
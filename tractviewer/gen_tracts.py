@@ -1,5 +1,11 @@
+"""Add today's tract plan to the plan store: `python -m tractviewer.gen_tracts`."""
+
+from datetime import date
 import numpy as np
 
+from tractviewer.io import default_plans_path
+from tractviewer.plans import PlanStore, make_plan
+
 
 # default
 AP = np.arange(-20.5, 21, 1)
@@ -16,6 +22,16 @@ ap, ml = np.meshgrid(AP, ML)
 # ml = np.array([3, 4, 5, 6])
 tracts = np.stack([ap.flatten(), ml.flatten()]).T
 
+# AP tilt (degrees) and planned depth (mm below zero), per tract or for all
+angle = 0.0
+depth = np.nan
+
 
 # x = [np.arange(7.5, 21, .5), 
-np.save('tracts.npy', tracts)
\ No newline at end of file
+# each day's plan goes into the store the viewer opens, named by date,
+# instead of overwriting tracts.npy; `python -m tractviewer plans list` shows them
+if __name__ == '__main__':
+    store_path = default_plans_path()
+    store = PlanStore(store_path) if store_path.exists() else PlanStore.create(store_path)
+    store.add(date.today().isoformat(), make_plan(tracts[:, 1], tracts[:, 0], angle, depth), replace=True)
+    print(f"Added plan {date.today().isoformat()} ({len(tracts)} tracts) to {store_path}")
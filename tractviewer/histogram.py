@@ -0,0 +1,120 @@
+"""Whole-volume intensity histograms for window/level.
+
+`volume_histogram` makes one streaming pass over a volume in chunks of
+contiguous memory, so window presets and slider ranges never need a
+per-slice reduction afterwards. 8- and 16-bit integer data is counted
+exactly with `np.bincount` over every raw value; anything else takes two
+passes, one for the range and one for a fixed-bin `np.histogram`.
+"""
+
+import numpy as np
+
+from tractviewer.utils import _LUT_INDEX
+from tractviewer.volume import ArrayVolume, Volume
+
+
+class VolumeHistogram:
+    """Counts of scaled intensities at ascending `values` (bin centers)."""
+
+    def __init__(self, values: np.ndarray, counts: np.ndarray):
+        order = np.argsort(values, kind='stable')
+        self.values = np.asarray(values, dtype=np.float64)[order]
+        self.counts = np.asarray(counts, dtype=np.int64)[order]
+        self._cdf = np.cumsum(self.counts)
+
+    @property
+    def total(self) -> int:
+        return int(self._cdf[-1]) if len(self._cdf) else 0
+
+    @property
+    def range(self) -> tuple[float, float]:
+        """Lowest and highest value present."""
+        if not self.total:
+            return 0.0, 0.0
+        return float(self.values[0]), float(self.values[-1])
+
+    def percentile(self, q: float) -> float:
+        """Value below which `q` percent of the voxels lie."""
+        if not self.total:
+            return 0.0
+        k = np.searchsorted(self._cdf, q / 100.0 * self.total, side='left')
+        return float(self.values[min(k, len(self.values) - 1)])
+
+    def window(self, low: float = 0.5, high: float = 99.5) -> tuple[float, float]:
+        """(vmin, vmax) clipping `low` and `100 - high` percent of voxels."""
+        lo, hi = self.percentile(low), self.percentile(high)
+        if hi <= lo:
+            lo, hi = self.range
+        return lo, hi
+
+
+class HistogramCancelled(Exception):
+    pass
+
+
+def _raw_chunks(volume, chunk_bytes: int):
+    """Yield the raw voxels of `volume` in chunks of at most `chunk_bytes`."""
+    if isinstance(volume, ArrayVolume) or not isinstance(volume, Volume):
+        arr = volume.array if isinstance(volume, ArrayVolume) else np.asarray(volume)
+        # cut along the axis with the largest stride, i.e. the slowest on disk
+        axis = int(np.argmax(np.abs(arr.strides)))
+        plane = arr.size // max(arr.shape[axis], 1) * arr.dtype.itemsize
+        step = max(1, chunk_bytes // max(plane, 1))
+        index = [slice(None)] * arr.ndim
+        for start in range(0, arr.shape[axis], step):
+            index[axis] = slice(start, start + step)
+            yield np.asarray(arr[tuple(index)])
+        return
+    plane = volume.shape[1] * volume.shape[2] * volume.raw_dtype.itemsize
+    step = max(1, chunk_bytes // plane)
+    for start in range(0, volume.shape[0], step):
+        stop = min(volume.shape[0], start + step)
+        yield np.stack([volume.raw_slice(i) for i in range(start, stop)])
+
+
+def volume_histogram(volume, bins: int = 4096, chunk_bytes: int = 64 << 20,
+                     progress=None) -> VolumeHistogram:
+    """Histogram of `volume`'s scaled intensities, streamed in chunks.
+
+    `progress`, if given, is called with the fraction done after each
+    chunk; it may raise (e.g. `HistogramCancelled`) to stop early.
+    """
+    if isinstance(volume, Volume):
+        dtype, slope, inter = volume.raw_dtype, volume.slope, volume.inter
+    else:
+        dtype, slope, inter = np.asarray(volume).dtype, 1.0, 0.0
+    n_chunks = -(-volume.shape[0] * volume.shape[1] * volume.shape[2] * dtype.itemsize // chunk_bytes)
+
+    def report(i, passes=1, p=0):
+        if progress is not None:
+            progress(min(1.0, (p * n_chunks + i + 1) / (passes * max(n_chunks, 1))))
+
+    if dtype.kind in 'iu' and dtype.itemsize in _LUT_INDEX:
+        index = _LUT_INDEX[dtype.itemsize]
+        size = 1 << (8 * dtype.itemsize)
+        counts = np.zeros(size, dtype=np.int64)
+        for i, chunk in enumerate(_raw_chunks(volume, chunk_bytes)):
+            counts += np.bincount(np.ascontiguousarray(chunk).view(index).ravel(), minlength=size)
+            report(i)
+        raw = np.arange(size, dtype=index).view(dtype)
+        present = counts > 0
+        return VolumeHistogram(raw[present] * slope + inter, counts[present])
+
+    # two passes: range, then fixed bins over it (NaNs are ignored)
+    lo, hi = np.inf, -np.inf
+    for i, chunk in enumerate(_raw_chunks(volume, chunk_bytes)):
+        if chunk.size:
+            lo = min(lo, float(np.nanmin(chunk)))
+            hi = max(hi, float(np.nanmax(chunk)))
+        report(i, 2, 0)
+    if not np.isfinite(lo):
+        return VolumeHistogram(np.zeros(0), np.zeros(0))
+    if hi <= lo:
+        hi = lo + 1.0
+    counts = np.zeros(bins, dtype=np.int64)
+    for i, chunk in enumerate(_raw_chunks(volume, chunk_bytes)):
+        counts += np.histogram(chunk, bins=bins, range=(lo, hi))[0]
+        report(i, 2, 1)
+    edges = np.linspace(lo, hi, bins + 1)
+    centers = (edges[:-1] + edges[1:]) / 2
+    return VolumeHistogram(centers * slope + inter, counts)
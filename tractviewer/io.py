@@ -1,46 +1,112 @@
 from pathlib import Path
 import os
 import numpy as np
-import nibabel as nib
+from tractviewer.cache import VolumeCache, cache_enabled, cache_key
+from tractviewer.plans import PLAN_SUFFIX, PlanStore
+from tractviewer.timing import span
+from tractviewer.volume import ArrayVolume, ProxyVolume, Volume, open_volume
 
 
-def load_mri(path: str | Path | None = None) -> np.ndarray:
+def default_mri_path() -> Path:
+    """The volume opened when none is given: env MRI_PATH or the lab default."""
+    return Path(os.environ.get('MRI_PATH', r"C:\Data\T1_post_grid_resample.nii.gz"))
+
+
+def load_mri(path: str | Path | None = None, lazy: bool = True, cache: bool | None = None,
+             progress=None) -> Volume:
     """Load a NIfTI file using nibabel. If path is None, tries env MRI_PATH or default path.
 
-    Returns a 3D numpy array (slices, H, W).
+    Returns a 3D (slices, H, W) `Volume` in the file's own dtype, with
+    `scl_slope`/`scl_inter` applied per slice when it is read or rendered.
+    With `lazy` (the default) the voxels stay on disk and are read one
+    slice at a time; otherwise they are read into memory up front.
+
+    Compressed files are decompressed once into the on-disk volume cache and
+    memory-mapped from there (see `tractviewer.cache`). `cache` overrides the
+    `TRACTVIEWER_NO_CACHE` environment switch. `progress` is called with the
+    fraction done while a compressed file is being decompressed.
     """
-    if path is None:
-        path = os.environ.get('MRI_PATH', r"C:\Data\T1_post_grid_resample.nii.gz")
-    path = Path(path)
+    path = default_mri_path() if path is None else Path(path)
     if not path.exists():
         raise FileNotFoundError(path)
 
-    img = nib.load(path)
-    arr = img.get_fdata()
-    arr = np.transpose(arr, (1, 2, 0))[:, :, ::-1]  # reorient to (slices, H, W)
-    if arr.ndim == 3:
-        return np.asarray(arr, dtype=np.float32)
-    elif arr.ndim == 4:
-        return np.asarray(arr[..., 0], dtype=np.float32)
-    else:
-        raise ValueError(f"Unsupported NIfTI data shape: {arr.shape}")
+    with span('load_mri.open'):
+        vol = open_volume(path)
+    if isinstance(vol, ProxyVolume):
+        with span('load_mri.decode'):
+            vol = _load_compressed(path, vol, cache, progress)
+    if not lazy and isinstance(vol, ArrayVolume):
+        with span('load_mri.read'):
+            vol = ArrayVolume(np.ascontiguousarray(vol.array), vol.slope, vol.inter, vol.affine)
+    vol.source = path
+    return vol
+
+
+def _load_compressed(path: Path, vol: ProxyVolume, cache: bool | None, progress) -> ArrayVolume:
+    if cache is None:
+        cache = cache_enabled()
+    if cache:
+        store = VolumeCache()
+        key = cache_key(path)
+        cached = store.get(key)
+        if cached is not None:
+            return cached
+        try:
+            return store.put(key, vol, progress)
+        except OSError:
+            pass  # unwritable cache dir or full disk: fall back to memory
+    arr = vol.read_into(np.empty(vol.shape, dtype=vol.raw_dtype), progress)
+    return ArrayVolume(arr, vol.slope, vol.inter, vol.affine)
+
 
+def default_plans_path() -> Path:
+    """The plan store opened when none is given: repo root `plans.tplan`."""
+    return Path(__file__).resolve().parents[1] / f'plans{PLAN_SUFFIX}'
 
-def load_grid(path: str | Path | None = None) -> np.ndarray:
-    """Load a tracts .npy mapping and normalize to (R, C, 2).
 
-    If path is None, tries repo root `tracts.npy` and falls back to a synthetic mapping.
+def load_grid(path: str | Path | None = None, plan: str | None = None) -> np.ndarray:
+    """Load grid coordinates as (N, 2) (row, col) = (ML, AP) mm.
+
+    `path` is a plan store (see `tractviewer.plans`), read for `plan` or
+    its newest plan, or a tracts .npy of (AP, ML) pairs. If path is None,
+    tries repo root `plans.tplan`, then `tracts.npy`.
     """
     if path is None:
         # repo root two levels up
         here = Path(__file__).resolve().parents[1]
-        p = here / 'tracts.npy'
-        if p.exists():
-            path = p
+        for p in (default_plans_path(), here / 'tracts.npy'):
+            if p.exists():
+                path = p
+                break
     if path is not None:
         path = Path(path)
         if path.exists():
+            if path.suffix == PLAN_SUFFIX:
+                store = PlanStore(path)
+                if not len(store):
+                    raise ValueError(f"{path} holds no plans")
+                return store.coords(plan or store.names[-1])
             arr = np.load(path)
             
             return arr[:, ::-1]
     raise FileNotFoundError("No valid tracts.npy file found at the specified path.")
+
+
+def load_registration(path: str | Path | None = None) -> np.ndarray | None:
+    """Load a 4x4 grid-to-scanner transform (mm) from .npy or whitespace text.
+
+    If path is None, tries repo root `registration.txt` and returns None
+    when there is none, in which case the built-in grid calibration is used
+    (see `tractviewer.mapping`).
+    """
+    if path is None:
+        p = Path(__file__).resolve().parents[1] / 'registration.txt'
+        if not p.exists():
+            return None
+        path = p
+    path = Path(path)
+    m = np.load(path) if path.suffix == '.npy' else np.loadtxt(path)
+    m = np.asarray(m, dtype=np.float64)
+    if m.shape != (4, 4):
+        raise ValueError(f"registration must be a 4x4 matrix, got {m.shape}")
+    return m
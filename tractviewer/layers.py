@@ -0,0 +1,168 @@
+"""Overlay volumes blended onto the main volume.
+
+A `Layer` is a volume on the same voxel grid as the base volume, with its
+own window, colormap and opacity. Its windowed slices are cached per layer,
+keyed only by what changes the pixels (slice, window, level, region), so
+changing a layer's colormap or opacity only re-composites. The background
+renderers fill those caches together with the base slice (see
+`render_with_layers`), so compositing on the GUI thread never windows a
+slice itself. `Compositor` blends the layers over the base slice in
+uint8/uint16 integer math with reused buffers.
+"""
+
+from collections import OrderedDict
+import threading
+import numpy as np
+
+from tractviewer.pyramid import Pyramid, render_region
+from tractviewer.utils import SliceRenderer
+
+
+def _ramp(*stops) -> np.ndarray:
+    """(256, 3) uint8 colormap through evenly spaced RGB `stops`."""
+    stops = np.asarray(stops, dtype=np.float64)
+    x = np.linspace(0, 255, len(stops))
+    i = np.arange(256)
+    return np.stack([np.interp(i, x, stops[:, k]) for k in range(3)], axis=1).round().astype(np.uint8)
+
+
+def _labels() -> np.ndarray:
+    # well separated hues for label masks; 0 stays black (and transparent)
+    h = (np.arange(256) * 0.618033988749895) % 1.0
+    k = (np.array([5, 3, 1])[None, :] + h[:, None] * 6) % 6
+    rgb = 1 - np.clip(np.minimum(k, 4 - k), 0, 1)
+    lut = (rgb * 255).round().astype(np.uint8)
+    lut[0] = 0
+    return lut
+
+
+COLORMAPS = {
+    'gray': _ramp((0, 0, 0), (255, 255, 255)),
+    'hot': _ramp((0, 0, 0), (255, 0, 0), (255, 255, 0), (255, 255, 255)),
+    'red': _ramp((0, 0, 0), (255, 0, 0)),
+    'green': _ramp((0, 0, 0), (0, 255, 0)),
+    'blue': _ramp((0, 0, 0), (0, 96, 255)),
+    'cool': _ramp((0, 255, 255), (255, 0, 255)),
+    'labels': _labels(),
+}
+
+
+class Layer:
+    """One overlay volume with its own window, colormap and opacity.
+
+    Voxels at or below the bottom of the window are transparent, so masks
+    and thresholded CT only cover what they mark.
+    """
+
+    def __init__(self, volume, name: str = '', vlim=(0.0, 1.0), colormap: str = 'hot',
+                 opacity: float = 0.5, max_slices: int = 96):
+        if colormap not in COLORMAPS:
+            raise ValueError(f"Unknown colormap: {colormap}")
+        self.volume = volume
+        self.name = name
+        self.vlim = tuple(vlim)
+        self.colormap = colormap
+        self.opacity = float(opacity)
+        self.visible = True
+        # default: more than a read-ahead ring holds, so cine playback finds its slices
+        self.max_slices = max_slices
+        self._pyramid = Pyramid(volume)
+        # slices are windowed on several worker threads; one renderer each
+        self._local = threading.local()
+        self._slices = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def shape(self):
+        return self.volume.shape
+
+    def cached(self, idx: int, level: int, region) -> np.ndarray | None:
+        """Windowed slice `idx` if it is in the layer's cache, else None."""
+        return self._get((idx, self.vlim, level, tuple(region)))
+
+    def _get(self, key) -> np.ndarray | None:
+        with self._lock:
+            gray = self._slices.get(key)
+            if gray is not None:
+                self._slices.move_to_end(key)
+            return gray
+
+    def slice(self, idx: int, level: int, region) -> np.ndarray:
+        """Windowed uint8 `region` of slice `idx` at `level`, rendered on a cache miss."""
+        vlim = self.vlim
+        key = (idx, vlim, level, tuple(region))
+        gray = self._get(key)
+        if gray is not None:
+            return gray
+        renderer = getattr(self._local, 'renderer', None)
+        if renderer is None:
+            renderer = self._local.renderer = SliceRenderer()
+        # the renderer reuses its buffer, so keep a copy
+        gray = render_region(self._pyramid, idx, vlim, level, region, renderer).copy()
+        with self._lock:
+            self._slices[key] = gray
+            while len(self._slices) > self.max_slices:
+                self._slices.popitem(last=False)
+        return gray
+
+    def tables(self) -> tuple[np.ndarray, np.ndarray]:
+        """Per gray level: premultiplied color (256, 3) and 255 - alpha (256,), both uint16."""
+        alpha = np.full(256, int(round(np.clip(self.opacity, 0, 1) * 255)), dtype=np.uint16)
+        alpha[0] = 0
+        color = COLORMAPS[self.colormap].astype(np.uint16) * alpha[:, None]
+        return color, 255 - alpha
+
+
+class Compositor:
+    """Blend layers over a gray base slice into a reused RGB buffer.
+
+    Each layer is `out = (out * (255 - a) + color * a) / 255` per channel,
+    looked up from 256-entry tables and computed in uint16, with the
+    division done by shifts.
+    """
+
+    def __init__(self):
+        self._out = None
+        self._acc = None
+        self._tmp = None
+        self._alpha = None
+
+    def _buffers(self, shape):
+        if self._out is None or self._out.shape[:2] != shape:
+            self._out = np.empty(shape + (3,), dtype=np.uint8)
+            self._acc = np.empty(shape + (3,), dtype=np.uint16)
+            self._tmp = np.empty(shape + (3,), dtype=np.uint16)
+            self._alpha = np.empty(shape, dtype=np.uint16)
+        return self._out, self._acc, self._tmp, self._alpha
+
+    def composite(self, base: np.ndarray, layers) -> np.ndarray:
+        """Blend `(gray, color, inv_alpha)` layers over `base`; see `Layer.tables`.
+
+        The result is only valid until the next call.
+        """
+        out, acc, tmp, alpha = self._buffers(base.shape)
+        out[...] = base[:, :, None]
+        for gray, color, inv_alpha in layers:
+            np.take(inv_alpha, gray, out=alpha)
+            np.multiply(out, alpha[:, :, None], out=acc)
+            np.take(color, gray, axis=0, out=tmp)
+            acc += tmp
+            # exact round(acc / 255) for acc <= 255 * 255
+            acc += 128
+            np.right_shift(acc, 8, out=tmp)
+            acc += tmp
+            np.right_shift(acc, 8, out=acc)
+            np.copyto(out, acc, casting='unsafe')
+        return out
+
+
+def render_with_layers(pyramid: Pyramid, idx: int, vlim, level: int, region, layers=(),
+                       renderer: SliceRenderer | None = None) -> np.ndarray:
+    """`render_region` of the base slice, after windowing `layers` at the same slice.
+
+    For the background renderers: the layer slices land in each layer's
+    cache, where compositing on the GUI thread picks them up.
+    """
+    for layer in layers:
+        layer.slice(idx, level, region)
+    return render_region(pyramid, idx, vlim, level, region, renderer)
@@ -0,0 +1,133 @@
+"""Mapping from grid coordinates (mm) to MRI slice and column indices.
+
+A `GridMapping` is one 4x4 matrix taking a grid point (r, c, 0, 1) to a
+volume index (slice, row, column, 1). With a registration (grid mm to
+scanner mm) it is built from the NIfTI affine; without one it falls back
+to the calibration of the lab's resampled scan (`CENTER`, `SCALE`).
+`VoxelLUT` applies a mapping to a whole grid once, so clicks, hovers and
+batch tools look tracts up instead of recomputing them.
+"""
+
+import hashlib
+import numpy as np
+
+# voxel (slice, column) of the grid origin, and pixels per mm (1 pixel = .5mm),
+# for the scan the grid was first calibrated on
+CENTER = (261, 248)
+SCALE = 2
+
+
+def index_from_file(shape) -> np.ndarray:
+    """4x4 taking on-disk voxel (i, j, k) to (slice, row, column) of a `Volume`.
+
+    Mirrors `tractviewer.volume.reorient`: slice = j, row = k and
+    column = W - 1 - i, with `shape` the (slices, H, W) volume shape.
+    """
+    m = np.zeros((4, 4))
+    m[0, 1] = 1
+    m[1, 2] = 1
+    m[2, 0] = -1
+    m[2, 3] = shape[2] - 1
+    m[3, 3] = 1
+    return m
+
+
+class GridMapping:
+    """Grid (r, c) in mm to volume (slice, column), as a 4x4 matrix.
+
+    Voxels are the nearest ones, except with `truncate`, where fractional
+    indices are cut toward zero as the original `grid_to_voxel` did.
+    """
+
+    def __init__(self, matrix: np.ndarray, truncate: bool = False):
+        self.matrix = np.asarray(matrix, dtype=np.float64)
+        if self.matrix.shape != (4, 4):
+            raise ValueError(f"mapping matrix must be 4x4, got {self.matrix.shape}")
+        self.truncate = truncate
+
+    @classmethod
+    def legacy(cls) -> 'GridMapping':
+        """slice = SCALE * c + CENTER[0], column = SCALE * r + CENTER[1], truncated.
+
+        Truncating keeps tracts at quarter-mm positions on the slices and
+        columns they have always been shown at.
+        """
+        m = np.zeros((4, 4))
+        m[0, 1], m[0, 3] = SCALE, CENTER[0]
+        m[2, 0], m[2, 3] = SCALE, CENTER[1]
+        m[3, 3] = 1
+        return cls(m, truncate=True)
+
+    @classmethod
+    def from_affine(cls, affine, shape, registration) -> 'GridMapping':
+        """Compose grid -> scanner (`registration`), scanner -> file voxel
+        (inverse `affine`) and file voxel -> volume index."""
+        registration = np.asarray(registration, dtype=np.float64)
+        if registration.shape != (4, 4):
+            raise ValueError(f"registration must be 4x4, got {registration.shape}")
+        return cls(index_from_file(shape) @ np.linalg.inv(np.asarray(affine, dtype=np.float64)) @ registration)
+
+    @classmethod
+    def for_volume(cls, volume, registration=None) -> 'GridMapping':
+        """Mapping into `volume`; the legacy one without a registration or affine."""
+        affine = getattr(volume, 'affine', None)
+        if registration is None or affine is None:
+            return cls.legacy()
+        return cls.from_affine(affine, volume.shape, registration)
+
+    def __call__(self, r, c) -> tuple[np.ndarray, np.ndarray]:
+        """(slice, column) of grid row/col (scalars or arrays)."""
+        r, c = np.asarray(r, dtype=np.float64), np.asarray(c, dtype=np.float64)
+        m = self.matrix
+        slices = m[0, 0] * r + m[0, 1] * c + m[0, 3]
+        cols = m[2, 0] * r + m[2, 1] * c + m[2, 3]
+        if self.truncate:
+            return slices.astype(int), cols.astype(int)
+        return np.floor(slices + .5).astype(int), np.floor(cols + .5).astype(int)
+
+    def key(self) -> str:
+        """Hash of the matrix and rounding, for caches keyed by how tracts map to voxels."""
+        h = hashlib.sha1(np.ascontiguousarray(self.matrix).data)
+        if self.truncate:
+            h.update(b'truncate')
+        return h.hexdigest()
+
+
+def grid_to_voxel(r, c, mapping: GridMapping | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """Map grid row/col (scalars or arrays) to (slice index, column)."""
+    return (mapping or GridMapping.legacy())(r, c)
+
+
+class VoxelLUT:
+    """Slice and column of every point of a grid, computed once.
+
+    Rebuild it when the volume, grid or registration changes. Points are
+    looked up by their index into the grid; a plan may hold several
+    tracts (e.g. at different angles) at one position, so coordinates
+    alone do not identify one.
+    """
+
+    def __init__(self, coords: np.ndarray | None, mapping: GridMapping | None = None):
+        self.mapping = mapping or GridMapping.legacy()
+        self.coords = np.zeros((0, 2)) if coords is None else np.asarray(coords)
+        self.slices, self.cols = self.mapping(self.coords[:, 0], self.coords[:, 1])
+
+    @property
+    def voxels(self) -> np.ndarray:
+        """(N, 2) slice and column per grid point."""
+        return np.stack([self.slices, self.cols], axis=1)
+
+    def __len__(self) -> int:
+        return len(self.coords)
+
+    def lookup(self, r: float, c: float, index: int = -1) -> tuple[int, int]:
+        """(slice, column) of grid point `index`, or of (r, c) if it is off the grid (-1)."""
+        if 0 <= index < len(self.coords):
+            return int(self.slices[index]), int(self.cols[index])
+        slice_idx, col = self.mapping(r, c)
+        return int(slice_idx), int(col)
+
+    def inside(self, shape) -> np.ndarray:
+        """Mask of the points whose slice and column lie within a volume of `shape`."""
+        n, _, w = shape
+        return (self.slices >= 0) & (self.slices < n) & (self.cols >= 0) & (self.cols < w)
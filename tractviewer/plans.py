@@ -0,0 +1,210 @@
+"""Many named tract plans in one memory-mapped file.
+
+A plan store (`.tplan`) is laid out as
+
+    magic (8 bytes) | index offset (uint64) | padding to 64 bytes
+    tract records (TRACT_DTYPE) of each plan, and earlier indexes
+    index length (uint64) | JSON index: record dtype and, per plan, name,
+        byte offset, count, created
+
+Opening reads the header and the JSON index and maps the file without
+touching the records, so it costs the same for ten tracts or ten million,
+and a plan's records are only paged in when that plan is used. Adding a
+plan appends its records and a new index at the end of the file and only
+then points the header at the new index, so an interrupted add leaves the
+store as it was; nothing already written is overwritten.
+"""
+
+from datetime import datetime
+from pathlib import Path
+import json
+import os
+import struct
+import numpy as np
+
+MAGIC = b'TVPLAN\x00\x02'
+PLAN_SUFFIX = '.tplan'
+_DATA_OFFSET = 64
+
+# ml/ap in grid mm (grid row and column), angle in degrees of AP tilt,
+# planned depth in mm below zero (NaN if not set) and the day it was planned
+TRACT_DTYPE = np.dtype([('ml', '<f4'), ('ap', '<f4'), ('angle', '<f4'),
+                        ('depth', '<f4'), ('date', '<M8[D]')])
+
+
+def make_plan(ml, ap, angle=0.0, depth=np.nan, date=None) -> np.ndarray:
+    """Tract records for parallel `ml`/`ap` arrays; the rest broadcast."""
+    ml, ap = np.broadcast_arrays(np.asarray(ml, dtype=np.float32), np.asarray(ap, dtype=np.float32))
+    tracts = np.empty(ml.size, dtype=TRACT_DTYPE)
+    tracts['ml'] = ml.ravel()
+    tracts['ap'] = ap.ravel()
+    tracts['angle'] = angle
+    tracts['depth'] = depth
+    tracts['date'] = np.datetime64('today', 'D') if date is None else np.datetime64(date, 'D')
+    return tracts
+
+
+def plan_coords(tracts: np.ndarray) -> np.ndarray:
+    """(N, 2) float64 grid (row, col) = (ml, ap), as `load_grid` returns."""
+    return np.stack([tracts['ml'], tracts['ap']], axis=1).astype(np.float64)
+
+
+class PlanStore:
+    """Named plans in one `.tplan` file; see the module docstring for the layout."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._open()
+
+    def _open(self):
+        """Read the header and index and map the file."""
+        with open(self.path, 'rb') as f:
+            head = f.read(16)
+            if len(head) < 16 or head[:8] != MAGIC:
+                raise ValueError(f"{self.path} is not a tract plan store")
+            (index_offset,) = struct.unpack('<Q', head[8:])
+            f.seek(index_offset)
+            # length-prefixed, as an interrupted add may have appended past it
+            (length,) = struct.unpack('<Q', f.read(8))
+            index = json.loads(f.read(length).decode('utf-8'))
+        dtype = np.lib.format.descr_to_dtype(index['dtype'])
+        if dtype != TRACT_DTYPE:
+            raise ValueError(f"{self.path} has unsupported tract records {dtype}")
+        self._plans = {p['name']: p for p in index['plans']}
+        self._map = np.memmap(self.path, dtype=np.uint8, mode='r')
+
+    @classmethod
+    def create(cls, path: str | Path, plans: dict | None = None) -> 'PlanStore':
+        """Write a new store holding `plans` ({name: tract records}), replacing any file."""
+        path = Path(path)
+        tmp = path.with_name(path.name + '.part')
+        with open(tmp, 'wb') as f:
+            f.write(MAGIC + struct.pack('<Q', _DATA_OFFSET))
+            f.write(b'\0' * (_DATA_OFFSET - 16))
+            _write_index(f, [])
+        os.replace(tmp, path)
+        store = cls(path)
+        for name, tracts in (plans or {}).items():
+            store.add(name, tracts)
+        return store
+
+    @property
+    def names(self) -> list[str]:
+        """Plan names, oldest first."""
+        return list(self._plans)
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._plans
+
+    def info(self, name: str) -> dict:
+        """Index entry of plan `name`: offset, count and created."""
+        return dict(self._plans[name])
+
+    def plan(self, name: str) -> np.ndarray:
+        """Read-only tract records of plan `name`, mapped from the file."""
+        p = self._plans[name]
+        nbytes = p['count'] * TRACT_DTYPE.itemsize
+        return self._map[p['offset']:p['offset'] + nbytes].view(TRACT_DTYPE)
+
+    def coords(self, name: str) -> np.ndarray:
+        return plan_coords(self.plan(name))
+
+    def add(self, name: str, tracts: np.ndarray, replace: bool = False):
+        """Append plan `name`; an existing plan of that name needs `replace`.
+
+        A replaced plan's old records stay in the file, unreferenced.
+        """
+        if name in self._plans and not replace:
+            raise ValueError(f"plan {name!r} already exists")
+        tracts = _as_tracts(tracts)
+        entries = [p for p in self._plans.values() if p['name'] != name]
+        # drop the map before the file grows under it
+        self._map = None
+        with open(self.path, 'r+b') as f:
+            end = f.seek(0, os.SEEK_END)
+            # 8-byte aligned records map to aligned (faster) arrays
+            offset = end + (-end % 8)
+            f.write(b'\0' * (offset - end))
+            f.write(np.ascontiguousarray(tracts).tobytes())
+            entries.append({'name': name, 'offset': offset, 'count': len(tracts),
+                            'created': datetime.now().isoformat(timespec='seconds')})
+            index_offset = f.tell()
+            _write_index(f, entries)
+            f.flush()
+            os.fsync(f.fileno())
+            # the old index stays valid until this single header write
+            f.seek(8)
+            f.write(struct.pack('<Q', index_offset))
+        self._open()
+
+
+def _as_tracts(tracts) -> np.ndarray:
+    """`tracts` as TRACT_DTYPE records; fields it lacks get the `make_plan` defaults."""
+    tracts = np.asarray(tracts)
+    if tracts.dtype == TRACT_DTYPE:
+        return tracts
+    names = tracts.dtype.names
+    if not names or 'ml' not in names or 'ap' not in names:
+        raise ValueError(f"tracts must be records with 'ml' and 'ap' fields, got {tracts.dtype}; "
+                         "see make_plan")
+    converted = make_plan(tracts['ml'], tracts['ap'])
+    for field in TRACT_DTYPE.names:
+        if field in names:
+            converted[field] = tracts[field]
+    return converted
+
+
+def _write_index(f, entries):
+    index = {'dtype': np.lib.format.dtype_to_descr(TRACT_DTYPE), 'plans': entries}
+    data = json.dumps(index).encode('utf-8')
+    f.write(struct.pack('<Q', len(data)) + data)
+
+
+class PlanDiff:
+    """How plan `b` differs from plan `a`, matching tracts by position and angle.
+
+    A plan may hold several tracts at one position at different angles, so
+    a tract whose angle changed counts as removed and added. `added` indexes
+    tracts of `b` not in `a`, `removed` tracts of `a` not in `b`;
+    `common_a`/`common_b` pair up the shared ones and `changed` indexes the
+    shared tracts of `b` whose depth differs.
+    """
+
+    def __init__(self, added, removed, common_a, common_b, changed):
+        self.added = added
+        self.removed = removed
+        self.common_a = common_a
+        self.common_b = common_b
+        self.changed = changed
+
+    def __repr__(self):
+        return (f"PlanDiff(added={len(self.added)}, removed={len(self.removed)}, "
+                f"common={len(self.common_a)}, changed={len(self.changed)})")
+
+
+def _tract_keys(tracts: np.ndarray, tol: float) -> np.ndarray:
+    # (position, angle) per tract: ml/ap quantized to `tol` and packed into one
+    # int64, angle quantized to `tol` degrees
+    ml = np.round(tracts['ml'].astype(np.float64) / tol).astype(np.int64)
+    ap = np.round(tracts['ap'].astype(np.float64) / tol).astype(np.int64)
+    angle = np.round(tracts['angle'].astype(np.float64) / tol).astype(np.int64)
+    return np.stack([(ml << 32) + (ap & 0xFFFFFFFF), angle], axis=1)
+
+
+def diff_plans(a: np.ndarray, b: np.ndarray, tol: float = 1e-3) -> PlanDiff:
+    """Vectorized comparison of two plans' tract records (see `PlanDiff`)."""
+    # number each distinct (position, angle) so both plans share one id space
+    keys = np.concatenate([_tract_keys(a, tol), _tract_keys(b, tol)])
+    _, ids = np.unique(keys, axis=0, return_inverse=True)
+    ids = ids.ravel()
+    ka, kb = ids[:len(a)], ids[len(a):]
+    _, common_a, common_b = np.intersect1d(ka, kb, assume_unique=False, return_indices=True)
+    added = np.flatnonzero(~np.isin(kb, ka))
+    removed = np.flatnonzero(~np.isin(ka, kb))
+    depth_a, depth_b = a['depth'][common_a], b['depth'][common_b]
+    same_depth = (depth_a == depth_b) | (np.isnan(depth_a) & np.isnan(depth_b))
+    changed = common_b[~same_depth]
+    return PlanDiff(added, removed, common_a, common_b, changed)
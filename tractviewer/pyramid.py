@@ -0,0 +1,106 @@
+"""Multi-resolution access to volume slices.
+
+Displaying a 1024² slice in a 400px window only needs every second or
+fourth pixel, and a zoomed-in crop only needs the visible region. `Pyramid`
+hands out power-of-two decimated slices, built lazily and kept in a small
+LRU, and `render_region` windows just the part of a level that is on screen.
+"""
+
+from collections import OrderedDict
+import math
+import threading
+import numpy as np
+
+from tractviewer.utils import SliceRenderer
+from tractviewer.volume import ProxyVolume, Volume
+
+
+class Pyramid:
+    """Lazily built power-of-two levels of the slices of one volume.
+
+    Level 0 is the volume itself; level k keeps every 2**k-th row and
+    column, which matches the nearest-neighbour downscaling Qt used to do
+    when drawing. Levels are kept in the volume's raw dtype so integer data
+    still goes through the lookup-table renderer.
+    """
+
+    def __init__(self, volume, max_slices: int = 64):
+        self.volume = volume
+        self.max_slices = max_slices
+        self._levels = OrderedDict()
+        self._lock = threading.Lock()
+        if isinstance(volume, Volume):
+            self.slope, self.inter = volume.slope, volume.inter
+        else:
+            self.slope, self.inter = 1.0, 0.0
+
+    @staticmethod
+    def level_for(scale: float) -> int:
+        """Coarsest level that still has at least one texel per screen pixel."""
+        if scale >= 1.0 or scale <= 0.0:
+            return 0
+        return int(math.floor(math.log2(1.0 / scale)))
+
+    def _raw(self, idx: int) -> np.ndarray:
+        if isinstance(self.volume, Volume):
+            return self.volume.raw_slice(idx)
+        return np.asarray(self.volume[idx])
+
+    def level(self, idx: int, level: int) -> np.ndarray:
+        """Raw slice `idx` at `level`."""
+        if level == 0:
+            return self._raw(idx)
+        key = (idx, level)
+        with self._lock:
+            arr = self._levels.get(key)
+            if arr is not None:
+                self._levels.move_to_end(key)
+                return arr
+        f = 1 << level
+        arr = np.ascontiguousarray(self._raw(idx)[::f, ::f])
+        with self._lock:
+            self._levels[key] = arr
+            while len(self._levels) > self.max_slices:
+                self._levels.popitem(last=False)
+        return arr
+
+
+def decimate(volume, level: int) -> np.ndarray:
+    """Every slice of `volume` at `level`, as one raw (slices, H', W') array.
+
+    Compressed volumes are streamed once (see `ProxyVolume.read_into`)
+    rather than decompressed once per slice.
+    """
+    f = 1 << level
+    n, h, w = volume.shape
+    shape = (n, -(-h // f), -(-w // f))
+    if isinstance(volume, ProxyVolume):
+        return volume.read_into(np.empty(shape, dtype=volume.raw_dtype), step=f)
+    out = None
+    for i in range(n):
+        raw = volume.raw_slice(i) if isinstance(volume, Volume) else np.asarray(volume[i])
+        if out is None:
+            out = np.empty(shape, dtype=raw.dtype)
+        out[i] = raw[::f, ::f]
+    return out
+
+
+def level_region(region: tuple[int, int, int, int], level: int) -> tuple[int, int, int, int]:
+    """Expand an image-space (x0, y0, x1, y1) region to whole texels of `level`."""
+    f = 1 << level
+    x0, y0, x1, y1 = region
+    return (x0 // f) * f, (y0 // f) * f, -(-x1 // f) * f, -(-y1 // f) * f
+
+
+def render_region(pyramid: Pyramid, idx: int, vlim, level: int, region,
+                  renderer: SliceRenderer | None = None) -> np.ndarray:
+    """Window the image-space `region` (x0, y0, x1, y1) of slice `idx` at `level`.
+
+    `region` should already be aligned with `level_region`.
+    """
+    if renderer is None:
+        renderer = SliceRenderer()
+    f = 1 << level
+    x0, y0, x1, y1 = region
+    raw = pyramid.level(idx, level)[y0 // f:-(-y1 // f), x0 // f:-(-x1 // f)]
+    return renderer.render(raw, vlim, pyramid.slope, pyramid.inter)
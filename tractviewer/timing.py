@@ -0,0 +1,127 @@
+"""Opt-in timing of the load, render and paint stages.
+
+Wrap a stage in `with span('name'):`. While timing is off (the default)
+`span` returns one shared no-op context manager, so a hook costs a
+function call and a flag check. Turn it on with `set_enabled(True)`, the
+View menu, or the `TRACTVIEWER_TRACE` environment variable; if that names
+a `.json` file the trace is written there when the process exits.
+
+Spans are kept as Chrome trace events ("X" complete events), so
+`export_trace` output opens in chrome://tracing or Perfetto.
+"""
+
+from collections import deque
+import atexit
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+_enabled = False
+_events = deque(maxlen=200_000)
+_t0 = time.perf_counter_ns()
+_pid = os.getpid()
+_NULL = contextlib.nullcontext()
+
+
+class _Span:
+    __slots__ = ('name', 'cat', 'start')
+
+    def __init__(self, name: str, cat: str):
+        self.name = name
+        self.cat = cat
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        _events.append((self.name, self.cat, self.start, end, threading.get_ident()))
+        return False
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def set_enabled(on: bool):
+    global _enabled
+    _enabled = bool(on)
+
+
+def span(name: str, cat: str = 'stage'):
+    """Context manager timing `name`; a shared no-op while timing is off."""
+    if not _enabled:
+        return _NULL
+    return _Span(name, cat)
+
+
+def timed(name: str, cat: str = 'stage'):
+    """Decorator form of `span` for whole methods such as `paintEvent`."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(name, cat):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def clear():
+    _events.clear()
+
+
+def durations(name: str, last: int = 100) -> list[float]:
+    """Durations in ms of the most recent `last` spans called `name`."""
+    out = []
+    for ev in reversed(_events):
+        if ev[0] == name:
+            out.append((ev[3] - ev[2]) / 1e6)
+            if len(out) >= last:
+                break
+    return out
+
+
+def frame_stats(name: str, window_s: float = 1.0) -> tuple[float, float]:
+    """(frames per second over the last `window_s`, last frame time in ms) for span `name`."""
+    now = time.perf_counter_ns()
+    since = now - int(window_s * 1e9)
+    count = 0
+    last_ms = None
+    for ev in reversed(_events):
+        if ev[0] != name:
+            continue
+        if last_ms is None:
+            last_ms = (ev[3] - ev[2]) / 1e6
+        if ev[3] < since:
+            break
+        count += 1
+    return count / window_s, last_ms or 0.0
+
+
+def export_trace(path) -> int:
+    """Write the recorded spans as Chrome trace-event JSON; returns the event count."""
+    events = [{
+        'name': name, 'cat': cat, 'ph': 'X', 'pid': _pid, 'tid': tid,
+        'ts': (start - _t0) / 1e3, 'dur': (end - start) / 1e3,
+    } for name, cat, start, end, tid in list(_events)]
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+    return len(events)
+
+
+def _init_from_env():
+    value = os.environ.get('TRACTVIEWER_TRACE')
+    if not value:
+        return
+    set_enabled(True)
+    if value.endswith('.json'):
+        atexit.register(export_trace, value)
+
+
+_init_from_env()
@@ -0,0 +1,224 @@
+"""Cine playback: a read-ahead ring buffer of slices and a steady-rate player."""
+
+import threading
+from PyQt5 import QtCore
+
+from tractviewer.timing import span
+from tractviewer.utils import SliceRenderer, gray_to_qimage
+
+
+class _FillTask(QtCore.QRunnable):
+    def __init__(self, buffer):
+        super().__init__()
+        self.buffer = buffer
+
+    def run(self):
+        renderer = SliceRenderer()
+        while True:
+            job = self.buffer._next_job()
+            if job is None:
+                return
+            generation, idx, key, render = job
+            try:
+                with span('read_ahead.render', 'worker'):
+                    img = gray_to_qimage(render(renderer)).copy()
+            except Exception:
+                img = None
+            self.buffer._store(generation, idx, key, img)
+
+
+class ReadAhead:
+    """Ring buffer of rendered slices around the current one.
+
+    A worker thread fills it in the scroll direction first (`ahead` slices)
+    and keeps a few behind. Slice `i` lives in slot `i % capacity`, so a
+    slot is only reused for a slice a whole ring away: turning around never
+    flushes what is already buffered, and only the far end is overwritten.
+    Rendering goes through the view's pyramid, so lazily read and cached
+    compressed volumes are read one slice at a time off the GUI thread.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.ahead = capacity * 3 // 4
+        self.behind = capacity - self.ahead - 1
+        self._slots = [None] * capacity
+        self._cond = threading.Condition()
+        self._generation = 0
+        self._make = None
+        self._count = 0
+        self._pos = 0
+        self._direction = 1
+        self._wrap = False
+        self._running = False
+        self.pool = QtCore.QThreadPool()
+        self.pool.setMaxThreadCount(1)
+
+    def configure(self, count: int, make_job):
+        """Buffer slices 0..count-1; `make_job(i)` gives `(key, render)` for slice i.
+
+        `render(renderer)` runs on the worker, as for `RenderScheduler.request`.
+        Entries whose key no longer matches are simply re-rendered.
+        """
+        with self._cond:
+            self._generation += 1
+            self._count = count
+            self._make = make_job
+        self._wake()
+
+    def reset(self):
+        """Forget every buffered slice (the volume changed)."""
+        with self._cond:
+            self._generation += 1
+            self._make = None
+            self._slots = [None] * self.capacity
+
+    def shutdown(self):
+        """Stop filling and wait for the slice being rendered, e.g. on close."""
+        self.reset()
+        self.pool.clear()
+        self.pool.waitForDone()
+
+    def move(self, idx: int, direction: int = 0, wrap: bool = False):
+        """Recentre on slice `idx`, reading ahead in `direction` (kept if 0)."""
+        with self._cond:
+            self._pos = idx
+            if direction:
+                self._direction = 1 if direction > 0 else -1
+            self._wrap = wrap
+        self._wake()
+
+    def get(self, idx: int, key):
+        """The buffered image of slice `idx` rendered as `key`, or None."""
+        slot = self._slots[idx % self.capacity]
+        if slot is not None and slot[0] == idx and slot[1] == key:
+            return slot[2]
+        return None
+
+    def __contains__(self, idx: int) -> bool:
+        slot = self._slots[idx % self.capacity]
+        return slot is not None and slot[0] == idx
+
+    def _wanted(self):
+        """Slice indices to hold, nearest ahead first, then the ones behind."""
+        n, pos, d = self._count, self._pos, self._direction
+        order = [pos] + [pos + d * k for k in range(1, self.ahead + 1)] + \
+                [pos - d * k for k in range(1, self.behind + 1)]
+        for i in order:
+            if self._wrap:
+                yield i % n
+            elif 0 <= i < n:
+                yield i
+
+    def _next_job(self):
+        with self._cond:
+            if self._make is None or not self._count:
+                self._running = False
+                return None
+            for i in self._wanted():
+                key, render = self._make(i)
+                slot = self._slots[i % self.capacity]
+                if slot is None or slot[0] != i or slot[1] != key:
+                    return self._generation, i, key, render
+            self._running = False
+            return None
+
+    def _store(self, generation, idx, key, img):
+        with self._cond:
+            if generation == self._generation and img is not None:
+                self._slots[idx % self.capacity] = (idx, key, img)
+
+    def _wake(self):
+        with self._cond:
+            if self._running or self._make is None:
+                return
+            self._running = True
+        self.pool.start(_FillTask(self))
+
+
+class CinePlayer(QtCore.QObject):
+    """Step a view through its slices at a steady frame rate.
+
+    The slice shown follows the wall clock rather than the number of timer
+    ticks, so a late tick skips ahead instead of slowing playback down.
+    A frame counts as dropped when its slice was not rendered in time,
+    whether because the tick came late or the read-ahead had not reached it.
+    `stats_changed(shown, dropped)` is emitted about once a second.
+    """
+
+    stats_changed = QtCore.pyqtSignal(int, int)
+    playing_changed = QtCore.pyqtSignal(bool)
+
+    def __init__(self, view, fps: float = 30.0, parent=None):
+        super().__init__(parent)
+        self.view = view
+        self.fps = fps
+        self.direction = 1
+        self.shown = 0
+        self.dropped = 0
+        self._frame = 0
+        self._reported = 0
+        self._clock = QtCore.QElapsedTimer()
+        self.timer = QtCore.QTimer(self)
+        self.timer.setTimerType(QtCore.Qt.PreciseTimer)
+        self.timer.timeout.connect(self._tick)
+
+    def is_playing(self) -> bool:
+        return self.timer.isActive()
+
+    def set_fps(self, fps: float):
+        self.fps = max(float(fps), 1.0)
+        if self.is_playing():
+            self.play(self.direction)
+
+    def play(self, direction: int | None = None):
+        if self.view.volume is None:
+            return
+        if direction:
+            self.direction = 1 if direction > 0 else -1
+        was_playing = self.is_playing()
+        self.shown = self.dropped = 0
+        self._frame = 0
+        self._reported = 0
+        self._clock.start()
+        self.timer.start(max(1, int(1000 / self.fps / 2)))
+        self.view.read_ahead.move(self.view.slice_index, self.direction, wrap=True)
+        if not was_playing:
+            self.playing_changed.emit(True)
+
+    def stop(self):
+        if not self.is_playing():
+            return
+        self.timer.stop()
+        self.stats_changed.emit(self.shown, self.dropped)
+        self.playing_changed.emit(False)
+
+    def toggle(self):
+        if self.is_playing():
+            self.stop()
+        else:
+            self.play()
+
+    def _tick(self):
+        # the timer runs at twice the frame rate so frames land close to their deadline
+        elapsed = self._clock.nsecsElapsed() / 1e9
+        frame = int(elapsed * self.fps)
+        steps = frame - self._frame
+        if steps <= 0:
+            return
+        self._frame = frame
+        view = self.view
+        if view.volume is None:
+            self.stop()
+            return
+        n = view.volume.shape[0]
+        target = (view.slice_index + steps * self.direction) % n
+        self.dropped += steps - 1
+        if view.is_buffered(target):
+            self.shown += 1
+        else:
+            self.dropped += 1
+        view.show_slice(target, self.direction, wrap=True)
+        if frame - self._reported >= self.fps:
+            self._reported = frame
+            self.stats_changed.emit(self.shown, self.dropped)
@@ -0,0 +1,243 @@
+"""Scrollable gallery of slice thumbnails, one per grid tract."""
+
+from collections import OrderedDict
+import numpy as np
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from tractviewer.mapping import VoxelLUT
+from tractviewer.pyramid import Pyramid, decimate
+from tractviewer.ui.slicecache import SliceCache
+from tractviewer.utils import SliceRenderer
+from tractviewer.volume import ArrayVolume, Volume
+
+RED = (255, 0, 0)
+
+
+class _ThumbSignals(QtCore.QObject):
+    done = QtCore.pyqtSignal(object, object)
+    decimated = QtCore.pyqtSignal(object, object)
+
+
+class _ThumbJob(QtCore.QRunnable):
+    def __init__(self, key, thumbs, shape, idx, col, vlim, size, zero, signals):
+        super().__init__()
+        self.key = key
+        self.thumbs = thumbs
+        self.shape = shape
+        self.idx = idx
+        self.col = col
+        self.vlim = vlim
+        self.size = size
+        self.zero = zero
+        self.signals = signals
+
+    def run(self):
+        try:
+            img = render_thumbnail(self.thumbs, self.shape, self.idx, self.col, self.vlim, self.size, self.zero)
+        except Exception:
+            img = None
+        self.signals.done.emit(self.key, img)
+
+
+class _DecimateJob(QtCore.QRunnable):
+    def __init__(self, volume, size, signals):
+        super().__init__()
+        self.volume = volume
+        self.size = size
+        self.signals = signals
+
+    def run(self):
+        try:
+            thumbs = decimated_volume(self.volume, self.size)
+        except Exception:
+            thumbs = None
+        self.signals.decimated.emit(self.volume, thumbs)
+
+
+def decimated_volume(volume, size: int) -> ArrayVolume:
+    """The whole volume at the pyramid level nearest `size`, read once."""
+    h, w = volume.shape[1:]
+    level = Pyramid.level_for(size / max(h, w))
+    if isinstance(volume, Volume):
+        return ArrayVolume(decimate(volume, level), volume.slope, volume.inter)
+    return ArrayVolume(decimate(volume, level))
+
+
+def render_thumbnail(thumbs: ArrayVolume, shape, idx: int, col: int, vlim, size: int,
+                     zero: int = 0) -> QtGui.QImage:
+    """Slice `idx` of the decimated `thumbs` of a `shape` volume, with its column line.
+
+    Drawn with NumPy only, like the other background renders, so it is
+    safe to call off the GUI thread.
+    """
+    h, w = shape[1:]
+    gray = SliceRenderer().render(thumbs.raw_slice(idx), vlim, thumbs.slope, thumbs.inter)
+    scale = min(size / w, size / h)
+    tw, th = max(1, round(w * scale)), max(1, round(h * scale))
+    ys = np.arange(th) * gray.shape[0] // th
+    xs = np.arange(tw) * gray.shape[1] // tw
+    rgb = np.repeat(gray[ys[:, None], xs[None, :], None], 3, axis=2)
+    x = min(int((int(np.clip(col, 0, w - 1)) + .5) * tw / w), tw - 1)
+    rgb[:, x] = RED
+    # a tick every 5 mm (10 rows) below zero, as in the main view; the 1 mm
+    # ticks would be sub-pixel here
+    rgb[np.arange(max(zero, 0), h, 10) * th // h, max(x - 2, 0):x + 3] = RED
+    return QtGui.QImage(rgb.data, tw, th, rgb.strides[0], QtGui.QImage.Format_RGB888).copy()
+
+
+class TractGalleryModel(QtCore.QAbstractListModel):
+    """List model of tract thumbnails, rendered only when a view asks for them.
+
+    `data` never renders: a missing thumbnail is queued and an empty
+    decoration returned. Thumbnails are sampled from a decimated copy of the
+    volume that is built once in the background when the volume is set;
+    until it is ready no thumbnail is queued. At most `workers` thumbnails
+    render at once, newest
+    requests first, so the tiles just scrolled into view come before ones
+    that have already scrolled away; stale requests beyond `max_queue` are
+    dropped. Finished thumbnails go into an LRU `SliceCache`.
+    """
+
+    def __init__(self, size: int = 96, cache_mb: float = 32, workers: int = 2, parent=None):
+        super().__init__(parent)
+        self.size = size
+        self.max_queue = 256
+        self.cache = SliceCache(cache_mb)
+        self.coords = np.zeros((0, 2))
+        self.vlim = (0.0, 1.0)
+        self.zero = 0
+        self.volume = None
+        self.lut = None
+        self._thumbs = None
+        self._voxels = None
+        # bumped when the volume or grid changes, so older results are ignored
+        self._generation = 0
+        self._queue = OrderedDict()
+        self._in_flight = set()
+        self._signals = _ThumbSignals()
+        self._signals.done.connect(self._on_done)
+        self._signals.decimated.connect(self._on_decimated)
+        self.pool = QtCore.QThreadPool(self)
+        self.pool.setMaxThreadCount(workers)
+
+    def set_volume(self, volume):
+        self.beginResetModel()
+        self.volume = volume
+        self._thumbs = None
+        self._reset_renders()
+        self.endResetModel()
+        if volume is not None:
+            self.pool.start(_DecimateJob(volume, self.size, self._signals))
+
+    def _on_decimated(self, volume, thumbs):
+        if volume is not self.volume or thumbs is None:
+            return
+        self._thumbs = thumbs
+        self._refresh()
+
+    def set_lut(self, lut: VoxelLUT):
+        """Show the tracts of `lut`, placed where it maps them."""
+        self.beginResetModel()
+        self.lut = lut
+        self.coords = lut.coords
+        self._voxels = lut.voxels
+        self._reset_renders()
+        self.endResetModel()
+
+    def set_window(self, vlim):
+        self.vlim = tuple(vlim)
+        self._refresh()
+
+    def set_zero(self, zero: int):
+        self.zero = int(zero)
+        self._refresh()
+
+    def _refresh(self):
+        # thumbnails are re-requested as the view asks for them again
+        self._queue.clear()
+        if self.rowCount():
+            self.dataChanged.emit(self.index(0), self.index(self.rowCount() - 1),
+                                  [QtCore.Qt.DecorationRole])
+
+    def _reset_renders(self):
+        self._generation += 1
+        self._queue.clear()
+        self.cache.clear()
+
+    def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.coords)
+
+    def _key(self, row: int):
+        return (self._generation, row, self.vlim, self.zero, self.size)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        if role == QtCore.Qt.DisplayRole:
+            return f"{self.coords[row, 0]:g}, {self.coords[row, 1]:g}"
+        if role == QtCore.Qt.DecorationRole:
+            key = self._key(row)
+            img = self.cache.get(key)
+            if img is None:
+                self._request(row, key)
+            return img
+        return None
+
+    def _request(self, row: int, key):
+        if self._thumbs is None or key in self._in_flight:
+            return
+        idx, col = (int(v) for v in self._voxels[row])
+        n, _, w = self.volume.shape
+        if not (0 <= idx < n and 0 <= col < w):
+            return
+        self._queue[key] = (row, idx, col)
+        self._queue.move_to_end(key)
+        while len(self._queue) > self.max_queue:
+            self._queue.popitem(last=False)
+        self._pump()
+
+    def _pump(self):
+        while self._queue and len(self._in_flight) < self.pool.maxThreadCount():
+            key, (row, idx, col) = self._queue.popitem(last=True)
+            self._in_flight.add(key)
+            self.pool.start(_ThumbJob(key, self._thumbs, self.volume.shape, idx, col, self.vlim,
+                                      self.size, self.zero, self._signals))
+
+    def _on_done(self, key, img):
+        self._in_flight.discard(key)
+        row = key[1]
+        # drop results for a window or grid that is no longer shown
+        if img is not None and row < self.rowCount() and key == self._key(row):
+            self.cache.put(key, img)
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [QtCore.Qt.DecorationRole])
+        self._pump()
+
+
+class TractGallery(QtWidgets.QListView):
+    """Icon-mode list of tract thumbnails; only visible tiles are rendered.
+
+    `tract_clicked(row, col, index)` reports the grid coordinates and index
+    into coords of a clicked tile.
+    """
+
+    tract_clicked = QtCore.pyqtSignal(float, float, int)
+
+    def __init__(self, size: int = 96, parent=None):
+        super().__init__(parent)
+        self.gallery = TractGalleryModel(size, parent=self)
+        self.setModel(self.gallery)
+        self.setViewMode(QtWidgets.QListView.IconMode)
+        self.setMovement(QtWidgets.QListView.Static)
+        self.setResizeMode(QtWidgets.QListView.Adjust)
+        self.setUniformItemSizes(True)
+        self.setIconSize(QtCore.QSize(size, size))
+        self.setGridSize(QtCore.QSize(size + 16, size + 24))
+        self.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        self.clicked.connect(self._on_clicked)
+
+    def _on_clicked(self, index):
+        coords = self.gallery.coords
+        row = index.row()
+        self.tract_clicked.emit(float(coords[row, 0]), float(coords[row, 1]), row)
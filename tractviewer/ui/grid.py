@@ -2,8 +2,58 @@ from PyQt5 import QtCore, QtGui, QtWidgets
 import numpy as np
 from typing import Optional
 
+from tractviewer.timing import timed
+from tractviewer.utils import gray_to_qimage
+
+
+class PointIndex:
+    """Uniform bucket grid over 2D points for nearest-within-radius queries.
+
+    Points are binned into square cells of side `cell`; a query only looks
+    at the cells within `tol` of it, so its cost does not grow with the
+    number of points.
+    """
+
+    def __init__(self, points: np.ndarray, cell: float):
+        self.points = np.asarray(points[:, :2], dtype=float)
+        self.cell = float(cell)
+        self.origin = self.points.min(axis=0)
+        ij = np.floor((self.points - self.origin) / self.cell).astype(np.int64)
+        self.ncols = int(ij[:, 1].max()) + 1
+        keys = ij[:, 0] * self.ncols + ij[:, 1]
+        self._order = np.argsort(keys, kind='stable')
+        uniq, start, counts = np.unique(keys[self._order], return_index=True, return_counts=True)
+        self._buckets = dict(zip(uniq.tolist(), zip(start.tolist(), (start + counts).tolist())))
+
+    def nearest(self, x: float, y: float, tol: float) -> Optional[int]:
+        """Index of the point closest to (x, y) within `tol`, or None.
+
+        Ties go to the lowest index, as with `np.argmin` over all points.
+        """
+        i = int(np.floor((x - self.origin[0]) / self.cell))
+        j = int(np.floor((y - self.origin[1]) / self.cell))
+        r = int(np.ceil(tol / self.cell))
+        spans = []
+        for di in range(i - r, i + r + 1):
+            for dj in range(max(j - r, 0), min(j + r + 1, self.ncols)):
+                span = self._buckets.get(di * self.ncols + dj)
+                if span is not None:
+                    spans.append(self._order[span[0]:span[1]])
+        if not spans:
+            return None
+        cand = np.sort(np.concatenate(spans))
+        d = np.hypot(self.points[cand, 0] - x, self.points[cand, 1] - y)
+        k = int(np.argmin(d))
+        if d[k] > tol:
+            return None
+        return int(cand[k])
+
+
 class GridWidget(QtWidgets.QWidget):
-    point_clicked = QtCore.pyqtSignal(float, float)
+    # row, col of the clicked point and its index into coords
+    point_clicked = QtCore.pyqtSignal(float, float, int)
+    # index into coords of the point under the mouse, -1 for none
+    point_hovered = QtCore.pyqtSignal(int)
     def __init__(self, coords: Optional[np.ndarray]=None, rect=None, parent=None):
         super().__init__(parent)
         self.setMinimumSize(200, 200)
@@ -14,6 +64,13 @@ class GridWidget(QtWidgets.QWidget):
         self.hovered = None
         self.view_matrix = None
         self.model_matrix = None
+        # inverse of view @ model, refreshed when either changes
+        self._inv_matrix = None
+        self.hit_tol = .5
+        self._index = None
+        # projected pixel positions and the pre-rendered static points
+        self._mapped = None
+        self._static = None
 
         self.coords = None
         if coords is not None:
@@ -31,35 +88,78 @@ class GridWidget(QtWidgets.QWidget):
         model[0, 2] = -rect[0] * model[0, 0]  # translate x
         model[1, 2] = -rect[1] * model[1, 1]  # translate y
         self.model_matrix = model
+        self._index = PointIndex(coords, self.hit_tol) if len(coords) else None
+        self.selected = None
+        self.hovered = None
+        self._update_projection()
+        self.update()
+
+    def _update_inverse(self):
+        if self.view_matrix is None or self.model_matrix is None:
+            self._inv_matrix = None
+            return
+        self._inv_matrix = np.linalg.inv(self.view_matrix @ self.model_matrix)
+
+    R = 4  # marker radius in pixels
+
+    def _update_projection(self):
+        """Project coords to widget pixels and pre-render the static points."""
+        self._update_inverse()
+        self._mapped = None
+        self._static = None
+        if self.coords is None or self._inv_matrix is None:
+            return
+        m = self.view_matrix @ self.model_matrix
+        mapped = self.coords[:, :2] @ m[:2, :2].T + m[:2, 2]
+        self._mapped = mapped.astype(int)
+        # drawn in device pixels, so points stay sharp on high-DPI screens
+        dpr = self.devicePixelRatioF()
+        w, h = round(self.width() * dpr), round(self.height() * dpr)
+        img = np.full((h, w), 255, dtype=np.uint8)
+        # stamp a filled disk (drawEllipse of radius R with a 1px outline) at every point
+        px, py = (self._mapped[:, 0] * dpr).astype(int), (self._mapped[:, 1] * dpr).astype(int)
+        r = round(self.R * dpr)
+        for dy in range(-r, r + 1):
+            for dx in range(-r, r + 1):
+                if dx * dx + dy * dy > (r + .5) ** 2:
+                    continue
+                x, y = px + dx, py + dy
+                ok = (x >= 0) & (x < w) & (y >= 0) & (y < h)
+                img[y[ok], x[ok]] = 0
+        self._static = QtGui.QPixmap.fromImage(gray_to_qimage(img))
+        self._static.setDevicePixelRatio(dpr)
 
+    def _marker_rect(self, idx) -> QtCore.QRect:
+        px, py = self._mapped[idx]
+        r = self.R + 2
+        return QtCore.QRect(int(px) - r, int(py) - r, 2 * r + 1, 2 * r + 1)
+
+    def _update_marker(self, idx):
+        """Repaint just the area around marker `idx`."""
+        if idx is not None and self._mapped is not None:
+            self.update(self._marker_rect(idx))
+
+    @timed('GridWidget.paintEvent', 'paint')
     def paintEvent(self, event):
-        if self.coords is None or self.model_matrix is None or self.view_matrix is None:
+        if self._static is not None and self._static.devicePixelRatio() != self.devicePixelRatioF():
+            # moved to a screen with another pixel ratio
+            self._update_projection()
+        if self._static is None:
             return
         painter = QtGui.QPainter(self)
-        rect = self.rect()
-        w = rect.width()
-        h = rect.height()
-        painter.fillRect(rect, QtGui.QColor('white'))
-        coords = np.append(self.coords, np.ones((self.coords.shape[0], 1)), axis=1)
-        mapped = self.view_matrix @ self.model_matrix @ coords.T
-        mapped = mapped.T
-        
-        R = 4
-        for idx in range(mapped.shape[0]):
-            x, y = mapped[idx, :2]
-            px = int(x)
-            py = int(y)
-            if idx == self.selected:
-                color = QtGui.QColor('red')
-            elif idx == self.hovered:
-                color = QtGui.QColor('blue')
-            else:
-                color = QtGui.QColor('black')
-            # painter.setPen(QtGui.QColor('black'))
-            # draw a filled circle
-            painter.setBrush(color)
-            painter.drawEllipse(px - R, py - R, 2 * R, 2 * R)
-    
+        dirty = event.rect()
+        dpr = self._static.devicePixelRatio()
+        source = QtCore.QRectF(dirty.x() * dpr, dirty.y() * dpr, dirty.width() * dpr, dirty.height() * dpr)
+        painter.drawPixmap(QtCore.QRectF(dirty), self._static, source)
+        R = self.R
+        for idx, color in ((self.hovered, 'blue'), (self.selected, 'red')):
+            if idx is None:
+                continue
+            px, py = self._mapped[idx]
+            painter.setBrush(QtGui.QColor(color))
+            painter.drawEllipse(int(px) - R, int(py) - R, 2 * R, 2 * R)
+        painter.end()
+
     def resizeEvent(self, event):
         self.view_matrix = np.eye(3)
         rect = self.rect()
@@ -71,47 +171,47 @@ class GridWidget(QtWidgets.QWidget):
         self.view_matrix[1, 1] = -grid_h
         self.view_matrix[0, 2] = margin
         self.view_matrix[1, 2] = h - margin
+        self._update_projection()
 
     def mouseToWorld(self, event):
         pos = event.pos()
         x, y = pos.x(), pos.y()
-        # invert the view and model matrices to get back to voxel space
-        inv_view = np.linalg.inv(self.view_matrix)
-        inv_model = np.linalg.inv(self.model_matrix)
+        # map back to voxel space with the cached inverse of view @ model
         pt = np.array([x, y, 1.0])
-        voxel_pt = inv_model @ inv_view @ pt
+        voxel_pt = self._inv_matrix @ pt
         return voxel_pt[:2]
 
     def getHit(self, event):
-        voxel_pt = self.mouseToWorld(event)
-        tol = .5
-        self.coords - voxel_pt
-        dists = np.linalg.norm(self.coords[:, :2] - voxel_pt, axis=1)
-        idx = np.argmin(dists)
-        if dists[idx] > tol:
+        if self._index is None or self._inv_matrix is None:
             return None
-        return idx
+        x, y = self.mouseToWorld(event)
+        return self._index.nearest(x, y, self.hit_tol)
 
     def mousePressEvent(self, event):
         idx = self.getHit(event)
-        self.selected = idx
+        if idx != self.selected:
+            self._update_marker(self.selected)
+            self.selected = idx
+            self._update_marker(idx)
         if idx is None:
             return
         r, c = self.coords[idx, 0].item(), self.coords[idx, 1].item()
-        self.point_clicked.emit(r, c)
-        self.update()
+        self.point_clicked.emit(r, c, idx)
 
     def mouseMoveEvent(self, event):
         """Show a tooltip with the grid coordinates under the cursor."""
 
         idx = self.getHit(event)
-        self.hovered = idx
+        if idx != self.hovered:
+            self._update_marker(self.hovered)
+            self.hovered = idx
+            self._update_marker(idx)
+            self.point_hovered.emit(-1 if idx is None else idx)
         if idx is None:
             return
         r, c = self.coords[idx, 0].item(), self.coords[idx, 1].item()
         text = f"row: {r}, col: {c}"
         QtWidgets.QToolTip.showText(event.globalPos(), text, self)
-        self.update()
 
     def leaveEvent(self, event):
         QtWidgets.QToolTip.hideText()
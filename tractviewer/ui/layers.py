@@ -0,0 +1,171 @@
+"""Dock panel listing the overlay layers blended over the MRI view."""
+
+from pathlib import Path
+from PyQt5 import QtCore, QtWidgets
+
+from tractviewer.layers import COLORMAPS, Layer
+from tractviewer.ui.loader import HistogramJob, VolumeLoader
+
+
+class LayerPanel(QtWidgets.QWidget):
+    """Add, remove and adjust the overlay layers of an `MRIView`.
+
+    Overlays are loaded on `pool` and get an initial window from their
+    histogram before they are shown. Every control only touches the
+    selected layer and re-composites; the base slice is not re-rendered.
+    """
+
+    def __init__(self, mri, pool: QtCore.QThreadPool, parent=None):
+        super().__init__(parent)
+        self.mri = mri
+        self.pool = pool
+        # loads and histograms still running, so they are not garbage collected
+        self._jobs = set()
+
+        layout = QtWidgets.QVBoxLayout(self)
+        self.list = QtWidgets.QListWidget()
+        layout.addWidget(self.list, 1)
+
+        buttons = QtWidgets.QHBoxLayout()
+        self.add_button = QtWidgets.QPushButton('Add...')
+        self.remove_button = QtWidgets.QPushButton('Remove')
+        buttons.addWidget(self.add_button)
+        buttons.addWidget(self.remove_button)
+        layout.addLayout(buttons)
+
+        form = QtWidgets.QFormLayout()
+        self.colormap = QtWidgets.QComboBox()
+        self.colormap.addItems(COLORMAPS)
+        form.addRow('Colormap', self.colormap)
+        self.opacity = QtWidgets.QSlider(QtCore.Qt.Horizontal)
+        self.opacity.setRange(0, 100)
+        form.addRow('Opacity', self.opacity)
+        self.vmin = QtWidgets.QDoubleSpinBox()
+        self.vmax = QtWidgets.QDoubleSpinBox()
+        for box in (self.vmin, self.vmax):
+            box.setRange(-1e9, 1e9)
+            box.setDecimals(2)
+            box.setKeyboardTracking(False)
+        form.addRow('Window min', self.vmin)
+        form.addRow('Window max', self.vmax)
+        layout.addLayout(form)
+
+        self.add_button.clicked.connect(self.open_layer)
+        self.remove_button.clicked.connect(self.remove_selected)
+        self.list.currentRowChanged.connect(lambda row: self.sync_controls())
+        self.list.itemChanged.connect(self._on_item_changed)
+        self.colormap.currentTextChanged.connect(self._on_colormap)
+        self.opacity.valueChanged.connect(self._on_opacity)
+        self.vmin.valueChanged.connect(lambda v: self._on_window())
+        self.vmax.valueChanged.connect(lambda v: self._on_window())
+        self.mri.layers_changed.connect(self.sync_list)
+        self.sync_list()
+
+    def current_layer(self) -> Layer | None:
+        row = self.list.currentRow()
+        return self.mri.layers[row] if 0 <= row < len(self.mri.layers) else None
+
+    def sync_list(self):
+        """Rebuild the list from the view's layers, keeping the selection if possible."""
+        row = self.list.currentRow()
+        self.list.blockSignals(True)
+        self.list.clear()
+        for layer in self.mri.layers:
+            item = QtWidgets.QListWidgetItem(layer.name)
+            item.setFlags(item.flags() | QtCore.Qt.ItemIsUserCheckable)
+            item.setCheckState(QtCore.Qt.Checked if layer.visible else QtCore.Qt.Unchecked)
+            self.list.addItem(item)
+        self.list.setCurrentRow(min(max(row, 0), self.list.count() - 1))
+        self.list.blockSignals(False)
+        self.sync_controls()
+
+    def sync_controls(self):
+        layer = self.current_layer()
+        for w in (self.colormap, self.opacity, self.vmin, self.vmax, self.remove_button):
+            w.setEnabled(layer is not None)
+        if layer is None:
+            return
+        for w in (self.colormap, self.opacity, self.vmin, self.vmax):
+            w.blockSignals(True)
+        self.colormap.setCurrentText(layer.colormap)
+        self.opacity.setValue(int(round(layer.opacity * 100)))
+        self.vmin.setValue(layer.vlim[0])
+        self.vmax.setValue(layer.vlim[1])
+        for w in (self.colormap, self.opacity, self.vmin, self.vmax):
+            w.blockSignals(False)
+
+    def _on_item_changed(self, item):
+        row = self.list.row(item)
+        if 0 <= row < len(self.mri.layers):
+            self.mri.layers[row].visible = item.checkState() == QtCore.Qt.Checked
+            self.mri.refresh_layers()
+
+    def _on_colormap(self, name):
+        layer = self.current_layer()
+        if layer is not None:
+            layer.colormap = name
+            self.mri.refresh_layers()
+
+    def _on_opacity(self, val):
+        layer = self.current_layer()
+        if layer is not None:
+            layer.opacity = val / 100
+            self.mri.refresh_layers()
+
+    def _on_window(self):
+        layer = self.current_layer()
+        if layer is None:
+            return
+        vmin, vmax = self.vmin.value(), self.vmax.value()
+        if vmax <= vmin:
+            return
+        layer.vlim = (vmin, vmax)
+        self.mri.refresh_layers()
+
+    def remove_selected(self):
+        layer = self.current_layer()
+        if layer is not None:
+            self.mri.remove_layer(layer)
+
+    def open_layer(self):
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(self, 'Add Overlay', str(Path.home()), 'NIfTI Files (*.nii *.nii.gz);;All Files (*)')
+        if path:
+            self.load_layer(path)
+
+    def load_layer(self, path, colormap: str = 'hot', opacity: float = 0.5):
+        """Load `path` in the background and add it as a layer once its window is known."""
+        loader = VolumeLoader(path)
+        name = Path(path).name
+        loader.signals.loaded.connect(lambda vol: self._on_loaded(loader, vol, name, colormap, opacity))
+        loader.signals.failed.connect(lambda msg: self._on_failed(loader, msg))
+        loader.signals.cancelled.connect(lambda: self._jobs.discard(loader))
+        self._jobs.add(loader)
+        self.pool.start(loader)
+
+    def _on_loaded(self, loader, vol, name, colormap, opacity):
+        self._jobs.discard(loader)
+        if self.mri.volume is not None and tuple(vol.shape) != tuple(self.mri.volume.shape):
+            self._on_failed(loader, f'{name} has shape {tuple(vol.shape)}, the MRI has {tuple(self.mri.volume.shape)}')
+            return
+        job = HistogramJob(vol)
+        job.signals.done.connect(lambda job, hist: self._on_histogram(job, hist, name, colormap, opacity))
+        self._jobs.add(job)
+        self.pool.start(job)
+
+    def _on_histogram(self, job, hist, name, colormap, opacity):
+        self._jobs.discard(job)
+        # the bottom of the window is transparent, so start it at the lowest
+        # value: masks and label maps then show everything they mark
+        vlim = hist.window(0.0, 99.5) if hist is not None else (0.0, 1.0)
+        if vlim[1] <= vlim[0]:
+            vlim = (vlim[0], vlim[0] + 1.0)
+        try:
+            self.mri.add_layer(Layer(job.volume, name, vlim, colormap, opacity))
+        except ValueError as e:
+            self._on_failed(job, str(e))
+            return
+        self.list.setCurrentRow(self.list.count() - 1)
+
+    def _on_failed(self, job, msg):
+        self._jobs.discard(job)
+        QtWidgets.QMessageBox.critical(self, 'Error', f'Failed to add overlay: {msg}')
@@ -0,0 +1,114 @@
+"""Background volume loading and reslicing for the UI."""
+
+import threading
+from PyQt5 import QtCore
+
+from tractviewer.histogram import HistogramCancelled, volume_histogram
+from tractviewer.io import load_mri
+
+
+class LoadCancelled(Exception):
+    """Raised inside a loader's progress callback to abort the load."""
+
+
+class _LoaderSignals(QtCore.QObject):
+    progress = QtCore.pyqtSignal(float)
+    loaded = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(str)
+    cancelled = QtCore.pyqtSignal()
+
+
+class VolumeLoader(QtCore.QRunnable):
+    """Run `load_mri` on a thread pool, reporting progress through Qt signals.
+
+    Connect to `signals` before starting it. `cancel` can be called from
+    any thread; the load stops at its next progress report and `cancelled`
+    is emitted instead of `loaded`.
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.signals = _LoaderSignals()
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _progress(self, fraction: float):
+        if self._cancel.is_set():
+            raise LoadCancelled()
+        self.signals.progress.emit(fraction)
+
+    def run(self):
+        try:
+            vol = load_mri(self.path, progress=self._progress)
+        except LoadCancelled:
+            self.signals.cancelled.emit()
+            return
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        if self._cancel.is_set():
+            self.signals.cancelled.emit()
+        else:
+            self.signals.loaded.emit(vol)
+
+
+class _HistogramSignals(QtCore.QObject):
+    done = QtCore.pyqtSignal(object, object)
+
+
+class HistogramJob(QtCore.QRunnable):
+    """Compute a volume's histogram on a thread pool.
+
+    Emits `signals.done(self, histogram)`, with None if it failed or was
+    cancelled.
+    """
+
+    def __init__(self, volume):
+        super().__init__()
+        self.volume = volume
+        self.signals = _HistogramSignals()
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _progress(self, fraction: float):
+        if self._cancel.is_set():
+            raise HistogramCancelled()
+
+    def run(self):
+        try:
+            hist = volume_histogram(self.volume, progress=self._progress)
+        except Exception:
+            hist = None
+        self.signals.done.emit(self, hist)
+
+
+class _PlaneSignals(QtCore.QObject):
+    done = QtCore.pyqtSignal(object, object)
+
+
+class PlaneJob(QtCore.QRunnable):
+    """Reslice a trajectory plane through a `ResliceCache` on a thread pool.
+
+    Emits `signals.done(self, plane)`, with None if it failed.
+    """
+
+    def __init__(self, reslicer, volume, slice_idx: int, zero: int, angle: float):
+        super().__init__()
+        self.reslicer = reslicer
+        self.volume = volume
+        self.slice_idx = slice_idx
+        self.zero = zero
+        self.angle = angle
+        self.signals = _PlaneSignals()
+
+    def run(self):
+        try:
+            plane = self.reslicer.trajectory_plane(self.volume, self.slice_idx, self.zero, self.angle)
+        except Exception:
+            plane = None
+        self.signals.done.emit(self, plane)
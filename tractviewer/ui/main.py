@@ -2,20 +2,52 @@ from pathlib import Path
 import numpy as np
 from PyQt5 import QtCore, QtWidgets
 
-from tractviewer.io import load_mri, load_grid
+from tractviewer import timing
+from tractviewer.io import default_plans_path, load_grid, load_registration
+from tractviewer.mapping import GridMapping, VoxelLUT
+from tractviewer.plans import PLAN_SUFFIX, PlanStore, plan_coords
+from tractviewer.reslice import ResliceCache
+from tractviewer.ui.gallery import TractGallery
 from tractviewer.ui.grid import GridWidget
+from tractviewer.ui.layers import LayerPanel
+from tractviewer.ui.loader import HistogramJob, PlaneJob, VolumeLoader
 from tractviewer.ui.mri import MRIView
+from tractviewer.ui.ortho import OrthoView
+from tractviewer.ui.profile import ProfileJob, ProfilePlot
+
+# window presets as (low, high) percentiles of the volume histogram
+WINDOW_PRESETS = {
+    'Manual': None,
+    'Auto 0.5\u201399.5%': (0.5, 99.5),
+    'Auto 1\u201399%': (1.0, 99.0),
+    'Auto 2\u201398%': (2.0, 98.0),
+    'Full range': (0.0, 100.0),
+}
+
 
 class MainWindow(QtWidgets.QMainWindow):
     def __init__(self, volume=None):
         super().__init__()
         self.setWindowTitle('Tract Viewer - Grid + MRI')
+        # Python jobs (loading, profiles) stay off Qt's global pool: Qt uses
+        # that for parallel image conversion on the GUI thread, which would
+        # deadlock with a job there waiting for the GIL
+        self.pool = QtCore.QThreadPool(self)
         central = QtWidgets.QWidget()
         self.setCentralWidget(central)
         layout = QtWidgets.QHBoxLayout(central)
 
+        left = QtWidgets.QWidget()
+        llay = QtWidgets.QVBoxLayout(left)
+        # plans of the open plan store; switching only reads the chosen plan
+        self.plan_combo = QtWidgets.QComboBox()
+        self.plan_combo.hide()
+        llay.addWidget(self.plan_combo)
         self.grid = GridWidget()
-        layout.addWidget(self.grid, 1)
+        llay.addWidget(self.grid, 3)
+        self.profile_plot = ProfilePlot()
+        llay.addWidget(self.profile_plot, 1)
+        layout.addWidget(left, 1)
 
         right = QtWidgets.QWidget()
         rlay = QtWidgets.QVBoxLayout(right)
@@ -36,25 +68,100 @@ class MainWindow(QtWidgets.QMainWindow):
         self.contrast_slider.setMaximum(600)
         self.contrast_slider.setValue(200)
         cl.addWidget(self.contrast_slider)
+        # slider positions are multiples of window_step in data units; the
+        # step and ranges follow the volume's histogram once it is known
+        self.window_step = 1.0
+        self.window_preset = QtWidgets.QComboBox()
+        self.window_preset.addItems(WINDOW_PRESETS)
+        self.window_preset.setCurrentIndex(1)
+        self.window_preset.currentIndexChanged.connect(lambda i: self.apply_window_preset())
+        cl.addWidget(self.window_preset)
 
         self.zero_spinner = QtWidgets.QSpinBox()
         self.zero_spinner.setMinimum(0)
         self.zero_spinner.setMaximum(512)
         self.zero_spinner.setValue(0)
         cl.addWidget(self.zero_spinner)
+
+        # AP tilt of the tract; non-zero angles show an oblique plane along it
+        cl.addWidget(QtWidgets.QLabel('Angle'))
+        self.angle_spinner = QtWidgets.QDoubleSpinBox()
+        self.angle_spinner.setRange(-60, 60)
+        self.angle_spinner.setSingleStep(1)
+        self.angle_spinner.setSuffix('\u00b0')
+        cl.addWidget(self.angle_spinner)
+
+        # cine playback through the slices; Space in the view toggles it too
+        self.play_button = QtWidgets.QPushButton('Play')
+        self.play_button.setCheckable(True)
+        cl.addWidget(self.play_button)
+        self.cine_fps = QtWidgets.QSpinBox()
+        self.cine_fps.setRange(1, 120)
+        self.cine_fps.setValue(30)
+        self.cine_fps.setSuffix(' fps')
+        cl.addWidget(self.cine_fps)
         rlay.addWidget(controls)
 
         layout.addWidget(right, 2)
 
-        self.grid.update_coords(load_grid())
+        # orthogonal views live in a dock; the volume is only handed to them
+        # while it is shown, so their per-axis copies cost nothing otherwise
+        self.ortho = OrthoView()
+        self.ortho_dock = QtWidgets.QDockWidget('Orthogonal Views', self)
+        self.ortho_dock.setWidget(self.ortho)
+        self.addDockWidget(QtCore.Qt.BottomDockWidgetArea, self.ortho_dock)
+        self.ortho_dock.hide()
+        self.ortho_dock.visibilityChanged.connect(lambda visible: self.sync_ortho())
+
+        # thumbnail of every tract, fed the same way as the orthogonal views
+        self.gallery = TractGallery()
+        self.gallery_dock = QtWidgets.QDockWidget('Tract Gallery', self)
+        self.gallery_dock.setWidget(self.gallery)
+        self.addDockWidget(QtCore.Qt.LeftDockWidgetArea, self.gallery_dock)
+        self.gallery_dock.hide()
+        self.gallery_dock.visibilityChanged.connect(lambda visible: self.sync_gallery())
+        self.gallery.tract_clicked.connect(self.on_point_clicked)
+
+        # overlay volumes (masks, CT, atlases) blended over the MRI view
+        self.layer_panel = LayerPanel(self.mri, self.pool)
+        self.layers_dock = QtWidgets.QDockWidget('Layers', self)
+        self.layers_dock.setWidget(self.layer_panel)
+        self.addDockWidget(QtCore.Qt.RightDockWidgetArea, self.layers_dock)
+        self.layers_dock.hide()
+
+        # the grid is read once the event loop runs, so the window shows first
+        QtCore.QTimer.singleShot(0, self.load_default_grid)
 
         self.grid.point_clicked.connect(self.on_point_clicked)
+        self.grid.point_hovered.connect(self.on_point_hovered)
         self.brightness_slider.valueChanged.connect(self.on_brightness_changed)
         self.contrast_slider.valueChanged.connect(self.on_contrast_changed)
-        self.zero_spinner.valueChanged.connect(lambda val: setattr(self.mri, 'zero', val) or self.mri.update())
+        self.zero_spinner.valueChanged.connect(self.on_zero_changed)
+        self.angle_spinner.valueChanged.connect(lambda val: self.show_tract())
+        self.mri.cine.set_fps(self.cine_fps.value())
+        self.play_button.toggled.connect(self.on_play_toggled)
+        self.cine_fps.valueChanged.connect(self.mri.cine.set_fps)
+        self.mri.cine.playing_changed.connect(self.on_playing_changed)
+        self.mri.cine.stats_changed.connect(self.on_cine_stats)
+        self.reslicer = ResliceCache()
+        # the newest trajectory plane being resliced; older results are dropped
+        self._plane_job = None
+        self._clicked = None
+        # grid -> scanner transform, and the voxel of every grid tract under it;
+        # the table is rebuilt whenever the volume, grid or registration changes
+        self.registration = None
+        self.lut = VoxelLUT(None)
+        # the open plan store and the tract records of the plan shown, if any
+        self.plans = None
+        self.plan_tracts = None
+        self.plan_combo.currentTextChanged.connect(self.set_plan)
+        # profiles of every grid tract for the current volume, filled in the background
+        self._profiles = None
+        self._profile_job = None
+        self.histogram = None
+        self._histogram_job = None
 
-        self.on_brightness_changed(self.brightness_slider.value())
-        self.on_contrast_changed(self.contrast_slider.value())
+        self.mri.set_brightness_contrast(float(self.brightness_slider.value()), float(self.contrast_slider.value()))
 
         menubar = self.menuBar()
         file_menu = menubar.addMenu('&File')
@@ -64,14 +171,104 @@ class MainWindow(QtWidgets.QMainWindow):
         open_grid_action = QtWidgets.QAction('Open Grid...', self)
         open_grid_action.triggered.connect(self.open_grid)
         file_menu.addAction(open_grid_action)
+        open_registration_action = QtWidgets.QAction('Open Registration...', self)
+        open_registration_action.triggered.connect(self.open_registration)
+        file_menu.addAction(open_registration_action)
+
+        view_menu = menubar.addMenu('&View')
+        view_menu.addAction(self.ortho_dock.toggleViewAction())
+        view_menu.addAction(self.gallery_dock.toggleViewAction())
+        view_menu.addAction(self.layers_dock.toggleViewAction())
+        view_menu.addSeparator()
+        timing_action = QtWidgets.QAction('Show Timings', self, checkable=True)
+        timing_action.setChecked(timing.enabled())
+        timing_action.toggled.connect(self.set_timing)
+        view_menu.addAction(timing_action)
+        export_trace_action = QtWidgets.QAction('Export Timing Trace...', self)
+        export_trace_action.triggered.connect(self.export_trace)
+        view_menu.addAction(export_trace_action)
 
-    def on_point_clicked(self, r, c):
+        # volume loading runs on a worker thread; progress lives in the status bar
+        self._loader = None
+        self.load_progress = QtWidgets.QProgressBar()
+        self.load_progress.setRange(0, 100)
+        self.load_progress.setMaximumWidth(200)
+        self.load_cancel = QtWidgets.QPushButton('Cancel')
+        self.load_cancel.clicked.connect(self.cancel_load)
+        self.statusBar().addPermanentWidget(self.load_progress)
+        self.statusBar().addPermanentWidget(self.load_cancel)
+        self.load_progress.hide()
+        self.load_cancel.hide()
+
+    def on_point_clicked(self, r, c, idx=-1):
+        """Show grid point (r, c); `idx` is its index into the grid, -1 if off it."""
+        self._clicked = (r, c, idx)
         if self.mri.volume is None:
             return
-        center = (261, 248)
-        col = int(2*r + center[1])
-        slice_idx = int(2*c + center[0])
+        slice_idx, col = self.lut.lookup(r, c, idx)
         print(f"Point clicked at grid row {r}, col {c} -> MRI slice {slice_idx}, column {col}")
+        if self.plan_tracts is not None and 0 <= idx < len(self.plan_tracts):
+            # reslice along the angle the tract was planned at
+            tract = self.plan_tracts[idx]
+            self.angle_spinner.blockSignals(True)
+            self.angle_spinner.setValue(float(tract['angle']))
+            self.angle_spinner.blockSignals(False)
+            if np.isfinite(tract['depth']):
+                self.statusBar().showMessage(f"Planned depth {float(tract['depth']):g} mm ({tract['date']})", 5000)
+        self.show_tract()
+
+    def on_point_hovered(self, idx):
+        if idx < 0 or self._profiles is None:
+            self.profile_plot.set_profile(None)
+            return
+        r, c = self.grid.coords[idx, 0].item(), self.grid.coords[idx, 1].item()
+        # profiles start at the top of the volume; show them from the zero depth down
+        self.profile_plot.set_profile(self._profiles[idx, self.mri.zero:], f"row {r}, col {c}")
+
+    def update_profiles(self):
+        """Recompute (or load from disk) the profiles of every grid tract."""
+        self._profiles = None
+        self.profile_plot.set_profile(None)
+        if self.mri.volume is None or self.grid.coords is None:
+            self._profile_job = None
+            return
+        job = ProfileJob(self.mri.volume, self.grid.coords, mapping=self.lut.mapping)
+        job.signals.done.connect(self._on_profiles)
+        self._profile_job = job
+        self.pool.start(job)
+
+    def _on_profiles(self, job, profiles):
+        if job is self._profile_job:
+            self._profile_job = None
+            self._profiles = profiles
+            self.refresh_profile()
+
+    def refresh_profile(self):
+        self.on_point_hovered(-1 if self.grid.hovered is None else self.grid.hovered)
+
+    def show_tract(self):
+        """Show the last clicked tract, resliced along its angle if it has one."""
+        if self._clicked is None or self.mri.volume is None:
+            return
+        r, c, idx = self._clicked
+        slice_idx, col = self.lut.lookup(r, c, idx)
+        if self.ortho.cursor is not None:
+            self.ortho.set_cursor(slice_idx, self.ortho.cursor[1], col)
+        angle = self.angle_spinner.value()
+        self._plane_job = None
+        if angle:
+            zero = self.mri.zero
+            plane = self.reslicer.get(self.mri.volume, slice_idx, zero, angle)
+            if plane is not None:
+                self.mri.set_plane(plane, key=(slice_idx, zero, angle), slice_idx=slice_idx)
+                self.mri.set_column(col)
+                return
+            # reslicing takes a while; keep the spinner responsive and only show the newest plane
+            job = PlaneJob(self.reslicer, self.mri.volume, slice_idx, zero, angle)
+            job.signals.done.connect(lambda job, plane: self._on_plane(job, plane, col))
+            self._plane_job = job
+            self.pool.start(job, 1)
+            return
         # try:
         #     mr = int(np.clip(r, 0, self.grid_mapping.shape[0] - 1))
         #     mc = int(np.clip(c, 0, self.grid_mapping.shape[1] - 1))
@@ -88,34 +285,301 @@ class MainWindow(QtWidgets.QMainWindow):
         #     col = int(c * img_w / self.grid.cols + img_w / (2 * self.grid.cols))
         self.mri.set_slice(slice_idx)
         self.mri.set_column(col)
+        self.prefetch_neighbors(r, c, slice_idx)
+
+    def _on_plane(self, job, plane, col):
+        if job is not self._plane_job:
+            return
+        self._plane_job = None
+        if plane is None or job.volume is not self.mri.volume:
+            return
+        self.mri.set_plane(plane, key=(job.slice_idx, job.zero, job.angle), slice_idx=job.slice_idx)
+        self.mri.set_column(col)
+
+    def prefetch_neighbors(self, r, c, slice_idx, count=8):
+        """Warm the slice cache for the nearest grid points and adjacent slices."""
+        coords = self.grid.coords
+        indices = []
+        if coords is not None and len(coords) > 1:
+            d = np.hypot(coords[:, 0] - r, coords[:, 1] - c)
+            k = min(count + 1, len(d))
+            near = np.argpartition(d, k - 1)[:k]
+            near = near[np.argsort(d[near])]
+            indices.extend(self.lut.slices[near].tolist())
+        indices.extend([slice_idx + 1, slice_idx - 1, slice_idx + 2, slice_idx - 2])
+        self.mri.prefetch(i for i in indices if i != slice_idx)
+
+    def sync_ortho(self):
+        """Bring the orthogonal views up to date with the main view."""
+        if not self.ortho_dock.isVisible():
+            return
+        if self.ortho.volume is not self.mri.volume:
+            self.ortho.vlim = self.mri.vlim
+            self.ortho.set_volume(self.mri.volume)
+        elif self.ortho.vlim != self.mri.vlim:
+            self.ortho.set_window(self.mri.vlim)
+
+    def sync_gallery(self):
+        """Bring the tract gallery up to date with the volume, grid and window."""
+        if not self.gallery_dock.isVisible():
+            return
+        model = self.gallery.gallery
+        if model.vlim != self.mri.vlim:
+            model.set_window(self.mri.vlim)
+        if model.zero != self.mri.zero:
+            model.set_zero(self.mri.zero)
+        if model.volume is not self.mri.volume:
+            model.set_volume(self.mri.volume)
+        if model.lut is not self.lut:
+            model.set_lut(self.lut)
+
+    def on_zero_changed(self, val):
+        self.mri.set_zero(val)
+        self.refresh_profile()
+        self.sync_gallery()
+        # the oblique plane pivots around the zero depth
+        if self.angle_spinner.value():
+            self.show_tract()
 
     def on_brightness_changed(self, val):
-        b = float(val)
+        b = float(val) * self.window_step
+        self._set_manual()
         self.mri.set_brightness_contrast(b, self.mri.contrast)
+        self.sync_ortho()
+        self.sync_gallery()
 
     def on_contrast_changed(self, val):
-        c = float(val)
+        c = float(val) * self.window_step
+        self._set_manual()
         self.mri.set_brightness_contrast(self.mri.brightness, c)
+        self.sync_ortho()
+        self.sync_gallery()
+
+    def _set_manual(self):
+        # dragging a slider leaves any preset
+        self.window_preset.blockSignals(True)
+        self.window_preset.setCurrentIndex(0)
+        self.window_preset.blockSignals(False)
+
+    def set_window(self, vmin, vmax):
+        """Show [vmin, vmax] and move both sliders there with a single render."""
+        b, c = (vmin + vmax) / 2.0, max(vmax - vmin, self.window_step)
+        for slider, val in ((self.brightness_slider, b), (self.contrast_slider, c)):
+            slider.blockSignals(True)
+            slider.setValue(int(round(val / self.window_step)))
+            slider.blockSignals(False)
+        self.mri.set_brightness_contrast(b, c)
+        self.sync_ortho()
+        self.sync_gallery()
+
+    def apply_window_preset(self):
+        preset = WINDOW_PRESETS[self.window_preset.currentText()]
+        if preset is None or self.histogram is None:
+            return
+        self.set_window(*self.histogram.window(*preset))
+
+    def update_histogram(self):
+        """Start computing the histogram of the current volume in the background."""
+        if self._histogram_job is not None:
+            self._histogram_job.cancel()
+        self.histogram = None
+        self._histogram_job = None
+        if self.mri.volume is None:
+            return
+        job = HistogramJob(self.mri.volume)
+        job.signals.done.connect(self._on_histogram)
+        self._histogram_job = job
+        self.pool.start(job)
+
+    def _on_histogram(self, job, hist):
+        if job is not self._histogram_job:
+            return
+        self._histogram_job = None
+        if hist is None or not hist.total:
+            return
+        self.histogram = hist
+        # slider ranges cover the data: about a thousand steps across it
+        lo, hi = hist.range
+        span = max(hi - lo, 1e-6)
+        self.window_step = span / 1000.0
+        self.brightness_slider.blockSignals(True)
+        self.contrast_slider.blockSignals(True)
+        self.brightness_slider.setRange(int(np.floor(lo / self.window_step)), int(np.ceil(hi / self.window_step)))
+        self.contrast_slider.setRange(1, 2000)
+        self.brightness_slider.setValue(int(round(self.mri.brightness / self.window_step)))
+        self.contrast_slider.setValue(int(round(self.mri.contrast / self.window_step)))
+        self.brightness_slider.blockSignals(False)
+        self.contrast_slider.blockSignals(False)
+        self.apply_window_preset()
+
+    def on_play_toggled(self, on):
+        if on:
+            self.mri.cine.play()
+        else:
+            self.mri.cine.stop()
+
+    def on_playing_changed(self, playing):
+        self.play_button.blockSignals(True)
+        self.play_button.setChecked(playing)
+        self.play_button.setText('Stop' if playing else 'Play')
+        self.play_button.blockSignals(False)
+
+    def on_cine_stats(self, shown, dropped):
+        self.statusBar().showMessage(f'Cine at {self.mri.cine.fps:g} fps: {shown} frames shown, {dropped} dropped', 3000)
+
+    def set_timing(self, on):
+        timing.set_enabled(on)
+        self.mri.update()
+
+    def export_trace(self):
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(self, 'Export Timing Trace', str(Path.home() / 'tractviewer-trace.json'), 'Chrome trace (*.json)')
+        if not path:
+            return
+        n = timing.export_trace(path)
+        self.statusBar().showMessage(f'Wrote {n} timing events to {path}', 5000)
 
     def open_mri(self):
         path, _ = QtWidgets.QFileDialog.getOpenFileName(self, 'Open MRI', str(Path.home()), 'NIfTI Files (*.nii *.nii.gz);;All Files (*)')
         if not path:
             return
-        try:
-            vol = load_mri(path)
-            self.mri.set_volume(vol)
-        except Exception as e:
-            QtWidgets.QMessageBox.critical(self, 'Error', f'Failed to load MRI: {e}')
-    
+        self.load_mri(path)
+
     def load_mri(self, path):
+        """Start loading `path` in the background; the volume is shown when ready."""
+        self.cancel_load()
+        loader = VolumeLoader(path)
+        loader.signals.progress.connect(lambda f: self.load_progress.setValue(int(f * 100)))
+        loader.signals.loaded.connect(lambda vol: self._on_loaded(loader, vol))
+        loader.signals.failed.connect(lambda msg: self._on_load_failed(loader, msg))
+        loader.signals.cancelled.connect(lambda: self._on_load_done(loader))
+        self._loader = loader
+        self.load_progress.setValue(0)
+        self.load_progress.show()
+        self.load_cancel.show()
+        self.statusBar().showMessage(f'Loading {Path(path).name}...')
+        self.pool.start(loader)
+
+    def cancel_load(self):
+        if self._loader is not None:
+            self._loader.cancel()
+            self._on_load_done(self._loader)
+
+    def _on_load_done(self, loader) -> bool:
+        """Hide the progress widgets; returns False for a superseded loader."""
+        if loader is not self._loader:
+            return False
+        self._loader = None
+        self.load_progress.hide()
+        self.load_cancel.hide()
+        self.statusBar().clearMessage()
+        return True
+
+    def _on_loaded(self, loader, vol):
+        if not self._on_load_done(loader):
+            return
+        self.reslicer.clear()
         try:
-            vol = load_mri(path)
             self.mri.set_volume(vol)
+            self.rebuild_lut()
+            self.sync_ortho()
+            self.sync_gallery()
+            self.update_profiles()
+            self.update_histogram()
         except Exception as e:
             QtWidgets.QMessageBox.critical(self, 'Error', f'Failed to load MRI: {e}')
 
+    def _on_load_failed(self, loader, msg):
+        if self._on_load_done(loader):
+            QtWidgets.QMessageBox.critical(self, 'Error', f'Failed to load MRI: {msg}')
+
+    def load_default_grid(self):
+        try:
+            self.registration = load_registration()
+        except (OSError, ValueError) as e:
+            self.statusBar().showMessage(f'Ignoring registration: {e}', 5000)
+        if default_plans_path().exists():
+            self.open_plans(default_plans_path())
+            return
+        try:
+            coords = load_grid()
+        except FileNotFoundError as e:
+            self.statusBar().showMessage(str(e), 5000)
+            return
+        self.set_grid(coords)
+
     def open_grid(self):
-        path, _ = QtWidgets.QFileDialog.getOpenFileName(self, 'Open Grid (tracts.npy)', str(Path.home()), 'NumPy files (*.npy);;All Files (*)')
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(self, 'Open Grid or Plans', str(Path.home()), f'Grids (*.npy *{PLAN_SUFFIX});;All Files (*)')
         if not path:
             return
-        self.grid.update_coords(load_grid(path))
\ No newline at end of file
+        if Path(path).suffix == PLAN_SUFFIX:
+            self.open_plans(path)
+            return
+        self.plans = None
+        self.plan_combo.hide()
+        self.set_grid(load_grid(path))
+
+    def open_plans(self, path):
+        """Open a plan store and show its newest plan."""
+        try:
+            store = PlanStore(path)
+        except (OSError, ValueError) as e:
+            QtWidgets.QMessageBox.critical(self, 'Error', f'Failed to open plans: {e}')
+            return
+        if not len(store):
+            self.statusBar().showMessage(f'{Path(path).name} holds no plans', 5000)
+            return
+        self.plans = store
+        self.plan_combo.blockSignals(True)
+        self.plan_combo.clear()
+        self.plan_combo.addItems(store.names)
+        self.plan_combo.setCurrentIndex(len(store) - 1)
+        self.plan_combo.blockSignals(False)
+        self.plan_combo.show()
+        self.set_plan(store.names[-1])
+
+    def set_plan(self, name):
+        if self.plans is None or name not in self.plans:
+            return
+        tracts = self.plans.plan(name)
+        self.set_grid(plan_coords(tracts), tracts)
+
+    def set_grid(self, coords, tracts=None):
+        """Show grid `coords`, with their plan records if they came from a plan store."""
+        if not len(coords):
+            self.statusBar().showMessage('The grid has no tracts', 5000)
+            return
+        self.plan_tracts = tracts
+        self.grid.update_coords(coords)
+        self.rebuild_lut()
+        self.sync_gallery()
+        self.update_profiles()
+
+    def open_registration(self):
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(self, 'Open Registration (4x4 grid to scanner)', str(Path.home()), 'Matrices (*.txt *.npy);;All Files (*)')
+        if not path:
+            return
+        try:
+            self.registration = load_registration(path)
+        except (OSError, ValueError) as e:
+            QtWidgets.QMessageBox.critical(self, 'Error', f'Failed to load registration: {e}')
+            return
+        self.rebuild_lut()
+        self.sync_gallery()
+        self.update_profiles()
+        self.show_tract()
+
+    def rebuild_lut(self):
+        """Map every grid tract into the current volume, once."""
+        mapping = GridMapping.for_volume(self.mri.volume, self.registration)
+        self.lut = VoxelLUT(self.grid.coords, mapping)
+
+    def closeEvent(self, event):
+        # stop a running load so its worker does not outlive the window
+        self.cancel_load()
+        # a histogram pass reads the whole volume; stop it rather than wait for it
+        if self._histogram_job is not None:
+            self._histogram_job.cancel()
+            self._histogram_job = None
+        self.mri.shutdown()
+        self.pool.waitForDone()
+        super().closeEvent(event)
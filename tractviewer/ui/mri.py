@@ -1,6 +1,22 @@
+from functools import partial
+import math
 import numpy as np
 from PyQt5 import QtGui, QtWidgets, QtCore
-from tractviewer.utils import numpy_to_qimage
+from tractviewer import timing
+from tractviewer.layers import Compositor, render_with_layers
+from tractviewer.pyramid import Pyramid, level_region
+from tractviewer.ui.cine import CinePlayer, ReadAhead
+from tractviewer.timing import span, timed
+from tractviewer.ui.scheduler import RenderScheduler
+from tractviewer.ui.slicecache import SliceCache, SlicePrefetcher
+from tractviewer.utils import SliceRenderer, gray_to_qimage, qimage_to_gray
+
+
+def _render_layers(qimg: QtGui.QImage, idx: int, level: int, region, layers, renderer=None) -> np.ndarray:
+    """Window `layers` at slice `idx` and hand back the already rendered base slice `qimg`."""
+    for layer in layers:
+        layer.slice(idx, level, region)
+    return qimage_to_gray(qimg)
 
 
 class MRIView(QtWidgets.QLabel):
@@ -10,11 +26,24 @@ class MRIView(QtWidgets.QLabel):
     release the volume will be cropped across all slices to the selected
     rectangle (in image coordinates). The image maintains aspect ratio when
     drawn in the widget.
+
+    Rendered slices are kept in `slice_cache` (an LRU bounded by `cache_mb`)
+    and `prefetch` warms it in the background. Cache misses are rendered
+    off the GUI thread by `scheduler`, which only draws the newest request.
+    Only the visible region of the slice is rendered, from the pyramid level
+    that matches the on-screen pixel density.
+
+    Overlay `layers` (see `tractviewer.layers`) are blended over the slice
+    when it is shown; each keeps its own cache of rendered slices, so
+    changing a layer only re-composites.
     """
 
-    def __init__(self, volume: np.ndarray = None, parent=None):
+    layers_changed = QtCore.pyqtSignal()
+    slice_changed = QtCore.pyqtSignal(int)
+
+    def __init__(self, volume: np.ndarray = None, parent=None, cache_mb: float = 256):
         super().__init__(parent)
-        self.volume = volume
+        self.volume = None
         self.slice_index = 0
         self.column_x = None
         # brightness/contrast interpreted as center and width for clipping
@@ -24,75 +53,186 @@ class MRIView(QtWidgets.QLabel):
         self.zero = 0
         # we will do custom painting to enforce aspect ratio
         self._pixmap = None
+        # image-space (x0, y0, x1, y1) covered by _pixmap
+        self._pixmap_region = None
+        # the rendered base slice behind _pixmap, kept for re-compositing layers
+        self._base_image = None
+        self._base_key = None
+        self.layers = []
+        self._compositor = Compositor()
+        self._pyramid = None
+        # a resliced 2D plane shown instead of slice_index, see set_plane
+        self._plane = None
+        self._plane_key = None
+        self._renderer = SliceRenderer()
+        self.slice_cache = SliceCache(cache_mb)
+        self._prefetcher = SlicePrefetcher(self.slice_cache)
+        self.scheduler = RenderScheduler(self.slice_cache, self)
+        self.scheduler.rendered.connect(self._on_rendered)
+        # cine navigation: wheel, keys and playback step through slice_index,
+        # with slices rendered ahead in the direction of travel
+        self.read_ahead = ReadAhead()
+        self._read_ahead_view = None
+        self.cine = CinePlayer(self, parent=self)
+        self._wheel_delta = 0
         self._display_rect = QtCore.QRect()
+        # overlays are cached separately and rebuilt only when their inputs
+        # change: the column line and ticks as one path, and the slice with
+        # them drawn on as a widget-sized frame that paints just blit
+        self._tick_path = None
+        self._tick_key = None
+        self._frame = None
+        self._frame_key = None
         # crop rectangle drawing state
         self._crop_active = False
         self._crop_start = None
         self._crop_rect = None
         self.crop_indices = None
-        # keep original volume for undo (reset)
-        self._original_volume = None
         # accept keyboard focus so keyPressEvent works
         self.setFocusPolicy(QtCore.Qt.StrongFocus)
         # enable mouse tracking
         self.setMouseTracking(True)
+        if volume is not None:
+            self.set_volume(volume)
 
     def set_volume(self, vol: np.ndarray):
+        self._prefetcher.cancel()
+        self.scheduler.cancel()
+        self.cine.stop()
+        self.read_ahead.reset()
+        self._read_ahead_view = None
+        self.slice_cache.clear()
+        self._plane = None
+        self._plane_key = None
         if vol is None:
             self.volume = None
+            self._pyramid = None
             self._pixmap = None
+            self._base_image = None
             self.update()
             return
         if vol.ndim != 3:
             raise ValueError('volume must be 3D')
         self.volume = vol
-        # store a copy as the original for possible reset
-        try:
-            self._original_volume = np.array(vol, copy=True)
-        except Exception:
-            self._original_volume = None
+        # overlays only make sense on the voxel grid they were drawn on
+        kept = [layer for layer in self.layers if layer.shape == tuple(vol.shape)]
+        if len(kept) != len(self.layers):
+            self.layers = kept
+            self.layers_changed.emit()
+        self._pyramid = Pyramid(vol)
         self.slice_index = max(0, min(self.slice_index, vol.shape[0] - 1))
         self.update_image()
 
+    def shutdown(self):
+        """Stop playback and background rendering and wait for the workers."""
+        self.cine.stop()
+        self.read_ahead.shutdown()
+        self._prefetcher.shutdown()
+        self.scheduler.shutdown()
+
     def set_slice(self, idx: int):
+        self.show_slice(idx)
+
+    def show_slice(self, idx: int, direction: int = 0, wrap: bool = False):
+        """Show slice `idx`, reading ahead in `direction` (-1, 1, or 0 to keep it)."""
         if self.volume is None:
             return
         self.slice_index = max(0, min(idx, self.volume.shape[0] - 1))
+        if self._plane is not None:
+            self._plane = None
+            self._plane_key = None
+            self._pyramid = Pyramid(self.volume)
+        self.read_ahead.move(self.slice_index, direction, wrap)
         self.update_image()
+        self.slice_changed.emit(self.slice_index)
+
+    def step(self, delta: int):
+        """Move `delta` slices from the current one, stopping playback."""
+        self.cine.stop()
+        if delta:
+            self.show_slice(self.slice_index + delta, delta)
+
+    def is_buffered(self, idx: int) -> bool:
+        """Whether slice `idx` can be shown at the current view without rendering."""
+        level, region = self._view()
+        key = self._cache_key(idx, level, region)
+        return key in self.slice_cache or self.read_ahead.get(idx, key) is not None
+
+    def _update_read_ahead(self, level: int, region):
+        """Point the read-ahead buffer at the current volume, window and view."""
+        overlays = self._overlays()
+        view = (self._pyramid, self._vlim(), level, region, tuple((layer, layer.vlim) for layer in overlays))
+        if view == self._read_ahead_view:
+            return
+        self._read_ahead_view = view
+        pyramid, vlim = self._pyramid, self._vlim()
+
+        def make_job(i):
+            return (i, vlim, level, region), partial(render_with_layers, pyramid, i, vlim, level, region, overlays)
+
+        self.read_ahead.configure(self.volume.shape[0], make_job)
+
+    def set_plane(self, plane: np.ndarray, key=None, slice_idx: int | None = None):
+        """Show a resliced (H, W) plane instead of a volume slice.
+
+        `key` identifies the plane in the slice cache (e.g. the trajectory it
+        was resliced along) and `slice_idx` is the volume slice it enters
+        through, where stepping carries on from. `set_slice` goes back to
+        volume slices.
+        """
+        if self.volume is None:
+            return
+        if slice_idx is not None:
+            self.slice_index = max(0, min(slice_idx, self.volume.shape[0] - 1))
+            self.read_ahead.move(self.slice_index)
+        self._plane = plane
+        self._plane_key = key
+        self._pyramid = Pyramid(plane[None])
+        self.update_image()
+        if slice_idx is not None:
+            self.slice_changed.emit(self.slice_index)
 
     def set_column(self, x: int):
         self.column_x = x
         self.update()
 
+    def set_zero(self, zero: int):
+        self.zero = zero
+        self.update()
+
     def set_brightness_contrast(self, brightness: float, contrast: float):
         self.brightness = brightness
         self.contrast = contrast
         self.update_image()
 
-    def update_image(self):
-        """Convert current slice to a QPixmap (stored in self._pixmap) and repaint."""
+    def _vlim(self) -> tuple[float, float]:
+        return (self.brightness - self.contrast / 2.0, self.brightness + self.contrast / 2.0)
+
+    @property
+    def vlim(self) -> tuple[float, float]:
+        """Display window (low, high) from brightness and contrast."""
+        return self._vlim()
+
+    def _image_size(self) -> tuple[int, int] | None:
+        """(width, height) of a full slice, or None without a volume."""
         if self.volume is None:
-            self._pixmap = None
-            self.update()
-            return
-        img = self.volume[self.slice_index].astype(np.float32)
-        out = np.clip(img, self.brightness - self.contrast / 2.0, self.brightness + self.contrast / 2.0)
-        qimg = numpy_to_qimage(out)
-        self._pixmap = QtGui.QPixmap.fromImage(qimg)
-        self.update()
+            return None
+        if self._plane is not None:
+            return self._plane.shape[1], self._plane.shape[0]
+        return self.volume.shape[2], self.volume.shape[1]
 
-    def paintEvent(self, event: QtGui.QPaintEvent):
-        painter = QtGui.QPainter(self)
+    def _layout(self) -> QtCore.QRect:
+        """Compute (and store) the widget rect the full slice is drawn into.
+
+        The rect preserves the aspect ratio and, with a crop, is zoomed so
+        the cropped area fills the widget; it may extend past the widget.
+        """
+        size = self._image_size()
+        if size is None:
+            self._display_rect = QtCore.QRect()
+            return self._display_rect
+        pw, ph = size
         rect = self.rect()
-        painter.fillRect(rect, QtGui.QColor('black'))
-        if self._pixmap is None:
-            painter.end()
-            return
-        # compute display rect that preserves aspect ratio and centers the image
-        # pw = self._pixmap.width()
-        # ph = self._pixmap.height()
-        pw = self._pixmap.width()
-        ph = self._pixmap.height()
         if self.crop_indices is not None:
             x0, x1, y0, y1 = self.crop_indices
             w = x1 - x0
@@ -111,39 +251,210 @@ class MRIView(QtWidgets.QLabel):
         dy = rect.y() + (rh - dh) // 2 - int(y0 / zoom / 2)
 
         self._display_rect = QtCore.QRect(dx, dy, dw, dh)
-        painter.drawPixmap(self._display_rect, self._pixmap)
+        return self._display_rect
+
+    def _view(self) -> tuple[int, tuple[int, int, int, int]]:
+        """Pyramid level and image-space region needed to fill the widget."""
+        pw, ph = self._image_size()
+        d = self._layout()
+        if d.width() <= 0 or d.height() <= 0:
+            return 0, (0, 0, pw, ph)
+        rect = self.rect()
+        sx = pw / d.width()
+        sy = ph / d.height()
+        x0 = max(0, int((rect.left() - d.left()) * sx))
+        y0 = max(0, int((rect.top() - d.top()) * sy))
+        x1 = min(pw, int(math.ceil((rect.right() + 1 - d.left()) * sx)))
+        y1 = min(ph, int(math.ceil((rect.bottom() + 1 - d.top()) * sy)))
+        if x1 <= x0 or y1 <= y0:
+            x0, y0, x1, y1 = 0, 0, pw, ph
+        level = Pyramid.level_for(d.width() / pw * self.devicePixelRatioF())
+        # keep at least a few texels across the visible region
+        while level > 0 and min(x1 - x0, y1 - y0) >> level < 4:
+            level -= 1
+        return level, level_region((x0, y0, x1, y1), level)
+
+    def _cache_key(self, idx: int, level: int, region):
+        slot = ('plane', self._plane_key) if self._plane is not None else idx
+        return (slot, self._vlim(), level, region)
+
+    def _render_job(self, idx: int, level: int, region):
+        """Callable rendering slice `idx`, and its overlay slices, for the scheduler or prefetcher."""
+        return partial(render_with_layers, self._pyramid, idx, self._vlim(), level, region, self._overlays())
+
+    def _overlays(self) -> tuple:
+        """Layers blended over the current view; none over a resliced plane."""
+        if self._plane is not None:
+            return ()
+        return tuple(layer for layer in self.layers if layer.visible and layer.opacity > 0)
+
+    @timed('MRIView.update_image')
+    def update_image(self, sync: bool = False):
+        """Convert current slice to a QPixmap (stored in self._pixmap) and repaint.
 
-        # draw vertical column line (map column_x in image coords to widget coords)
-        if self.column_x is not None and self._pixmap is not None:
-            img_w = self._pixmap.width()
+        Cache misses are handed to the render scheduler unless `sync` is set.
+        """
+        if self.volume is None:
+            self.scheduler.cancel()
+            self._pixmap = None
+            self.update()
+            return
+        level, region = self._view()
+        idx = 0 if self._plane is not None else self.slice_index
+        key = self._cache_key(idx, level, region)
+        qimg = self.slice_cache.get(key)
+        if self._plane is None:
+            self._update_read_ahead(level, region)
+            if qimg is None:
+                qimg = self.read_ahead.get(idx, key)
+        if qimg is None and not sync:
+            self.scheduler.request(key, self._render_job(idx, level, region))
+            return
+        # anything still rendering is older than what is shown now
+        self.scheduler.cancel()
+        if qimg is None:
+            with span('update_image.render'):
+                gray = self._render_job(idx, level, region)(self._renderer)
+                qimg = gray_to_qimage(gray).copy()
+            self.slice_cache.put(key, qimg)
+        self._on_rendered(key, qimg)
+
+    def _on_rendered(self, key, qimg: QtGui.QImage):
+        self._base_image = qimg
+        self._base_key = key
+        self._compose()
+        # update() is coalesced by Qt, so bursts of results paint once per frame
+        self.update()
+
+    def _compose(self):
+        """Turn the base slice, with any visible layers blended in, into _pixmap.
+
+        Layer slices that are not cached yet are windowed by the scheduler;
+        until they are, the previous frame stays up rather than flashing
+        the slice without its overlays.
+        """
+        qimg = self._base_image
+        if qimg is None:
+            return
+        key = self._base_key
+        overlays = self._overlays()
+        if overlays:
+            slot, _, level, region = key
+            grays = [layer.cached(slot, level, region) for layer in overlays]
+            if any(gray is None for gray in grays):
+                self.scheduler.request(key, partial(_render_layers, qimg, slot, level, region, overlays))
+                if self._pixmap is not None:
+                    return
+            else:
+                with span('MRIView.composite'):
+                    tables = [(gray,) + layer.tables() for gray, layer in zip(grays, overlays)]
+                    rgb = self._compositor.composite(qimage_to_gray(qimg), tables)
+                    h, w = rgb.shape[:2]
+                    qimg = QtGui.QImage(rgb.data, w, h, rgb.strides[0], QtGui.QImage.Format_RGB888)
+        with span('QPixmap.fromImage'):
+            self._pixmap = QtGui.QPixmap.fromImage(qimg)
+        self._pixmap_region = key[3]
+
+    def add_layer(self, layer):
+        """Blend `layer` over the slices; it must match the volume's shape."""
+        if self.volume is not None and layer.shape != tuple(self.volume.shape):
+            raise ValueError(f"layer shape {layer.shape} does not match the volume {tuple(self.volume.shape)}")
+        self.layers.append(layer)
+        self.layers_changed.emit()
+        self.refresh_layers()
+
+    def remove_layer(self, layer):
+        self.layers.remove(layer)
+        self.layers_changed.emit()
+        self.refresh_layers()
+
+    def refresh_layers(self):
+        """Re-composite after a layer's window, colormap, opacity or visibility changed."""
+        self._compose()
+        self.update()
+
+    def prefetch(self, indices):
+        """Render the given slices into the cache in the background, in order."""
+        if self.volume is None or self._plane is not None:
+            return
+        n = self.volume.shape[0]
+        level, region = self._view()
+        jobs = [(self._cache_key(i, level, region), self._render_job(i, level, region))
+                for i in dict.fromkeys(int(i) for i in indices) if 0 <= i < n]
+        self._prefetcher.prefetch(jobs)
+
+    def resizeEvent(self, event: QtGui.QResizeEvent):
+        super().resizeEvent(event)
+        # the visible region and pyramid level depend on the widget size
+        self.update_image()
+
+    def _ticks(self, pw: int, ph: int) -> QtGui.QPainterPath:
+        """Column line with a dot every 1 mm below zero (larger every 5 mm), as one path.
+
+        Assumes 1 pixel = .5mm; rebuilt only when the column, zero or
+        display rect changes.
+        """
+        d = self._display_rect
+        key = (self.column_x, self.zero, pw, ph, d.getRect())
+        if key != self._tick_key:
             # map column from image coords -> display coords
-            x_img = int(np.clip(self.column_x, 0, img_w - 1))
-            x_disp = self._display_rect.left() + int(x_img * (self._display_rect.width() / img_w))
-            pen = QtGui.QPen(QtGui.QColor('red'))
-            pen.setWidth(2)
-            painter.setPen(pen)
-            painter.drawLine(x_disp, self._display_rect.top(), x_disp, self._display_rect.bottom())
-
-            # draw points at 1mm increments along the column, assuming 1 pixel = .5mm
-            # for mm in range(0, ph // 2 + 1):
-            #     y_img_top = int(np.clip((ph // 2) - mm * 2, 0, ph - 1))
-            #     y_img_bottom = int(np.clip((ph // 2) + mm * 2, 0, ph - 1))
-            #     y_disp_top = self._display_rect.top() + int(y_img_top * (self._display_rect.height() / ph))
-            #     y_disp_bottom = self._display_rect.top() + int(y_img_bottom * (self._display_rect.height() / ph))
-            #     painter.setBrush(QtGui.QColor('red'))
-            #     painter.drawEllipse(x_disp - 3, y_disp_top - 3, 6, 6)
-            #     if mm != 0:
-            #         painter.drawEllipse(x_disp - 3, y_disp_bottom - 3, 6, 6)
-            increments = np.arange(self.zero, ph, 2)
-            for mm in increments:
-                x = x_disp
-                y = self._display_rect.top() + int(mm * self._display_rect.height() / ph)
+            x = d.left() + int(int(np.clip(self.column_x, 0, pw - 1)) * (d.width() / pw))
+            path = QtGui.QPainterPath()
+            path.moveTo(x, d.top())
+            path.lineTo(x, d.bottom())
+            for y_img in range(self.zero, ph, 2):
+                y = d.top() + int(y_img * d.height() / ph)
+                r = 1 if (y_img - self.zero) % 5 else 5
+                path.addEllipse(x - r, y - r, 2 * r, 2 * r)
+            self._tick_path = path
+            self._tick_key = key
+        return self._tick_path
+
+    def _base_frame(self) -> QtGui.QPixmap:
+        """The widget's contents without the crop rectangle, redrawn only when they change."""
+        pw, ph = self._image_size()
+        d = self._layout()
+        dpr = self.devicePixelRatioF()
+        key = (self._pixmap.cacheKey(), self._pixmap_region, d.getRect(), self.column_x,
+               self.zero, self.width(), self.height(), dpr)
+        if key == self._frame_key:
+            return self._frame
+        size = QtCore.QSize(round(self.width() * dpr), round(self.height() * dpr))
+        if self._frame is None or self._frame.size() != size:
+            self._frame = QtGui.QPixmap(size)
+            self._frame.setDevicePixelRatio(dpr)
+        with span('MRIView.frame', 'paint'):
+            painter = QtGui.QPainter(self._frame)
+            painter.fillRect(self.rect(), QtGui.QColor('black'))
+            # the pixmap covers only its region of the slice; map that into the display rect
+            x0, y0, x1, y1 = self._pixmap_region
+            sx = d.width() / pw
+            sy = d.height() / ph
+            target = QtCore.QRectF(d.left() + x0 * sx, d.top() + y0 * sy, (x1 - x0) * sx, (y1 - y0) * sy)
+            painter.drawPixmap(target, self._pixmap, QtCore.QRectF(self._pixmap.rect()))
+            if self.column_x is not None:
+                pen = QtGui.QPen(QtGui.QColor('red'))
+                pen.setWidth(2)
+                painter.setPen(pen)
                 painter.setBrush(QtGui.QColor('red'))
-                if (mm - self.zero) % 5:
-                    R = 1
-                else:
-                    R = 5
-                painter.drawEllipse(x - R, y - R, R*2, R*2)
+                painter.drawPath(self._ticks(pw, ph))
+            painter.end()
+        self._frame_key = key
+        return self._frame
+
+    @timed('MRIView.paintEvent', 'paint')
+    def paintEvent(self, event: QtGui.QPaintEvent):
+        painter = QtGui.QPainter(self)
+        if self._pixmap is None:
+            painter.fillRect(self.rect(), QtGui.QColor('black'))
+            painter.end()
+            return
+        # blit only the damaged part of the cached frame
+        frame = self._base_frame()
+        dirty = event.rect()
+        dpr = frame.devicePixelRatio()
+        source = QtCore.QRectF(dirty.x() * dpr, dirty.y() * dpr, dirty.width() * dpr, dirty.height() * dpr)
+        painter.drawPixmap(QtCore.QRectF(dirty), frame, source)
 
         # draw crop rectangle overlay if active or exists
         if self._crop_rect is not None:
@@ -154,21 +465,37 @@ class MRIView(QtWidgets.QLabel):
             painter.setBrush(brush)
             painter.drawRect(self._crop_rect)
 
+        if timing.enabled():
+            self._paint_timings(painter)
         painter.end()
+        self.scheduler.frame_painted()
+
+    def _paint_timings(self, painter: QtGui.QPainter):
+        """Frame rate and the latest paint and render times, top left."""
+        fps, paint_ms = timing.frame_stats('MRIView.paintEvent')
+        render = timing.durations('scheduler.render', 1) or timing.durations('update_image.render', 1)
+        text = f"{fps:.0f} fps  paint {paint_ms:.1f} ms"
+        if render:
+            text += f"  render {render[0]:.1f} ms"
+        painter.setPen(QtGui.QColor('yellow'))
+        painter.setBrush(QtGui.QColor(0, 0, 0, 160))
+        box = painter.fontMetrics().boundingRect(text).adjusted(-4, -2, 4, 2)
+        box.moveTopLeft(QtCore.QPoint(4, 4))
+        painter.drawRect(box)
+        painter.drawText(box, QtCore.Qt.AlignCenter, text)
 
     def _widget_to_image(self, pos: QtCore.QPoint) -> tuple[int, int] | None:
         """Map a QPoint in widget coordinates to image (x,y) coordinates.
 
         Returns (x_img, y_img) or None if outside the displayed image.
         """
-        if self._pixmap is None or self._display_rect.isNull():
+        if self._pixmap is None or self.volume is None or self._display_rect.isNull():
             return None
         if not self._display_rect.contains(pos):
             return None
         rx = pos.x() - self._display_rect.left()
         ry = pos.y() - self._display_rect.top()
-        img_w = self._pixmap.width()
-        img_h = self._pixmap.height()
+        img_w, img_h = self._image_size()
         x_img = int(np.clip(round(rx * img_w / self._display_rect.width()), 0, img_w - 1))
         y_img = int(np.clip(round(ry * img_h / self._display_rect.height()), 0, img_h - 1))
         return x_img, y_img
@@ -180,15 +507,13 @@ class MRIView(QtWidgets.QLabel):
             if self._display_rect.contains(event.pos()):
                 self._crop_active = True
                 self._crop_start = event.pos()
-                self._crop_rect = QtCore.QRect(self._crop_start, self._crop_start)
-                self.update()
+                self._set_crop_rect(QtCore.QRect(self._crop_start, self._crop_start))
 
     def mouseMoveEvent(self, event: QtGui.QMouseEvent):
         if self._crop_active and self._crop_start is not None:
-            self._crop_rect = QtCore.QRect(self._crop_start, event.pos()).normalized()
+            rect = QtCore.QRect(self._crop_start, event.pos()).normalized()
             # clamp to display rect
-            self._crop_rect = self._crop_rect.intersected(self._display_rect)
-            self.update()
+            self._set_crop_rect(rect.intersected(self._display_rect))
         else:
             # if near a mm increment on the column, show a tooltip with the mm - self.zero value
             pos = event.pos()
@@ -202,6 +527,15 @@ class MRIView(QtWidgets.QLabel):
                     QtWidgets.QToolTip.hideText()
 
 
+    def _set_crop_rect(self, rect: QtCore.QRect | None):
+        """Move the rubber band, repainting only the area it left and now covers."""
+        dirty = QtCore.QRect() if self._crop_rect is None else self._crop_rect
+        self._crop_rect = rect
+        if rect is not None:
+            dirty = dirty.united(rect)
+        # the 2 px pen straddles the edges
+        self.update(dirty.adjusted(-2, -2, 2, 2))
+
     def compute_crop_indices(self) -> tuple[int, int, int, int] | None:
         """Compute crop indices (x0, x1, y0, y1) in image coordinates from the current crop rectangle.
 
@@ -228,14 +562,34 @@ class MRIView(QtWidgets.QLabel):
         if event.button() == QtCore.Qt.LeftButton and self._crop_active:
             self.crop_indices = self.compute_crop_indices()
             self._crop_active = False
-            self._crop_rect = None
+            self._set_crop_rect(None)
             self.update_image()
 
+    def wheelEvent(self, event: QtGui.QWheelEvent):
+        # one slice per wheel notch; high-resolution wheels add up to a notch
+        self._wheel_delta += event.angleDelta().y()
+        steps = int(self._wheel_delta / 120)
+        if steps and self.volume is not None:
+            self._wheel_delta -= steps * 120
+            self.step(-steps)
+        event.accept()
+
     def keyPressEvent(self, event: QtGui.QKeyEvent):
-        """Press 'h' to reset crop (restore original volume if available)."""
-        if event.key() == QtCore.Qt.Key_H:
+        """'h' resets the crop; Up/Down, PageUp/PageDown, Home/End step
+        through slices and Space starts or stops cine playback."""
+        key = event.key()
+        steps = {QtCore.Qt.Key_Up: -1, QtCore.Qt.Key_Down: 1,
+                 QtCore.Qt.Key_PageUp: -10, QtCore.Qt.Key_PageDown: 10}
+        if key == QtCore.Qt.Key_H:
             self.crop_indices = None
-            self.update()
+            self.update_image()
+        elif key in steps and self.volume is not None:
+            self.step(steps[key])
+        elif key in (QtCore.Qt.Key_Home, QtCore.Qt.Key_End) and self.volume is not None:
+            target = 0 if key == QtCore.Qt.Key_Home else self.volume.shape[0] - 1
+            self.step(target - self.slice_index)
+        elif key == QtCore.Qt.Key_Space:
+            self.cine.toggle()
         else:
             super().keyPressEvent(event)
 
@@ -0,0 +1,163 @@
+"""Linked coronal, axial and sagittal panes over one volume."""
+
+import numpy as np
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from tractviewer.utils import SliceRenderer, gray_to_qimage
+from tractviewer.volume import AxisCache
+
+
+class _BuildAxis(QtCore.QRunnable):
+    def __init__(self, axes: AxisCache, axis: int):
+        super().__init__()
+        self.axes = axes
+        self.axis = axis
+
+    def run(self):
+        self.axes.build(self.axis)
+
+
+class OrthoPane(QtWidgets.QWidget):
+    """One aspect-preserving slice pane with a crosshair.
+
+    `clicked(row, col)` reports clicks in image coordinates. Moving the
+    crosshair only repaints; the image changes only through `set_image`.
+    """
+
+    clicked = QtCore.pyqtSignal(int, int)
+
+    def __init__(self, title: str, parent=None):
+        super().__init__(parent)
+        self.title = title
+        self.setMinimumSize(150, 150)
+        self._pixmap = None
+        self._crosshair = None
+        self._display_rect = QtCore.QRect()
+
+    def set_image(self, qimg: QtGui.QImage | None):
+        self._pixmap = None if qimg is None else QtGui.QPixmap.fromImage(qimg)
+        self.update()
+
+    def set_crosshair(self, row: int, col: int):
+        self._crosshair = (row, col)
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self)
+        rect = self.rect()
+        painter.fillRect(rect, QtGui.QColor('black'))
+        if self._pixmap is not None:
+            pw, ph = self._pixmap.width(), self._pixmap.height()
+            scale = min(rect.width() / pw, rect.height() / ph)
+            dw, dh = int(pw * scale), int(ph * scale)
+            self._display_rect = QtCore.QRect((rect.width() - dw) // 2, (rect.height() - dh) // 2, dw, dh)
+            painter.drawPixmap(self._display_rect, self._pixmap)
+            if self._crosshair is not None:
+                d = self._display_rect
+                row, col = self._crosshair
+                x = d.left() + int((col + .5) * d.width() / pw)
+                y = d.top() + int((row + .5) * d.height() / ph)
+                painter.setPen(QtGui.QPen(QtGui.QColor(255, 255, 0, 180)))
+                painter.drawLine(x, d.top(), x, d.bottom())
+                painter.drawLine(d.left(), y, d.right(), y)
+        painter.setPen(QtGui.QColor('white'))
+        painter.drawText(rect.adjusted(4, 2, 0, 0), QtCore.Qt.AlignLeft | QtCore.Qt.AlignTop, self.title)
+        painter.end()
+
+    def mousePressEvent(self, event):
+        d = self._display_rect
+        if self._pixmap is None or not d.contains(event.pos()):
+            return
+        col = int((event.pos().x() - d.left()) * self._pixmap.width() / d.width())
+        row = int((event.pos().y() - d.top()) * self._pixmap.height() / d.height())
+        self.clicked.emit(row, col)
+
+
+class OrthoView(QtWidgets.QWidget):
+    """Coronal, axial and sagittal panes sharing one volume and cursor.
+
+    The cursor is a (slice, row, col) voxel of the reoriented volume. Each
+    pane re-renders only when its own slice index changes; the others just
+    move their crosshair. Slices along strided axes come from contiguous
+    per-axis copies (see `AxisCache`) built in the background within
+    `budget_mb`.
+    """
+
+    # (axis, title); crosshair rows/cols and slice index per pane come from _pane_coords
+    AXES = ((0, 'Coronal'), (1, 'Axial'), (2, 'Sagittal'))
+
+    def __init__(self, budget_mb: float = 1024, parent=None):
+        super().__init__(parent)
+        self.budget_mb = budget_mb
+        self.volume = None
+        self.axes = None
+        self.cursor = None
+        self.vlim = (0.0, 1.0)
+        self._indices = [None, None, None]
+        self._renderers = [SliceRenderer() for _ in self.AXES]
+        self.pool = QtCore.QThreadPool(self)
+        layout = QtWidgets.QHBoxLayout(self)
+        self.panes = []
+        for axis, title in self.AXES:
+            pane = OrthoPane(title)
+            pane.clicked.connect(lambda row, col, axis=axis: self._on_pane_clicked(axis, row, col))
+            layout.addWidget(pane)
+            self.panes.append(pane)
+
+    @staticmethod
+    def _pane_coords(axis: int, cursor) -> tuple[int, tuple[int, int]]:
+        """Slice index and crosshair (row, col) of `cursor` in pane `axis`."""
+        s, h, w = cursor
+        if axis == 0:
+            return s, (h, w)
+        if axis == 1:
+            return h, (s, w)
+        return w, (h, s)
+
+    def set_volume(self, volume):
+        self.volume = volume
+        self._indices = [None, None, None]
+        if volume is None:
+            self.axes = None
+            for pane in self.panes:
+                pane.set_image(None)
+            return
+        self.axes = AxisCache(volume, self.budget_mb)
+        for axis in (1, 2, 0):
+            self.pool.start(_BuildAxis(self.axes, axis))
+        self.set_cursor(*(n // 2 for n in volume.shape))
+
+    def set_window(self, vlim):
+        self.vlim = tuple(vlim)
+        self._indices = [None, None, None]
+        if self.cursor is not None:
+            self.set_cursor(*self.cursor)
+
+    def set_cursor(self, s: int, h: int, w: int):
+        if self.axes is None:
+            return
+        shape = self.axes.shape
+        self.cursor = tuple(int(np.clip(v, 0, n - 1)) for v, n in zip((s, h, w), shape))
+        for axis, _ in self.AXES:
+            idx, crosshair = self._pane_coords(axis, self.cursor)
+            if idx != self._indices[axis]:
+                self._indices[axis] = idx
+                self._render(axis, idx)
+            self.panes[axis].set_crosshair(*crosshair)
+
+    def _render(self, axis: int, idx: int):
+        raw = self.axes.raw_slice(axis, idx)
+        gray = self._renderers[axis].render(raw, self.vlim, self.axes.slope, self.axes.inter)
+        self.panes[axis].set_image(gray_to_qimage(gray))
+
+    def _on_pane_clicked(self, axis: int, row: int, col: int):
+        if self.cursor is None:
+            return
+        s, h, w = self.cursor
+        if axis == 0:
+            h, w = row, col
+        elif axis == 1:
+            s, w = row, col
+        else:
+            h, s = row, col
+        self.set_cursor(s, h, w)
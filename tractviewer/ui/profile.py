@@ -0,0 +1,74 @@
+"""Tract intensity profile plot, fed by profiles computed in the background."""
+
+import numpy as np
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from tractviewer.profiles import MM_PER_SAMPLE, ProfileCache
+
+
+class _ProfileSignals(QtCore.QObject):
+    done = QtCore.pyqtSignal(object, object)
+
+
+class ProfileJob(QtCore.QRunnable):
+    """Compute (or load from disk) the profiles of every tract in a grid.
+
+    Emits `signals.done(self, profiles)`; `profiles` is None if it failed.
+    """
+
+    def __init__(self, volume, coords, cache: ProfileCache | None = None, mapping=None):
+        super().__init__()
+        self.volume = volume
+        self.coords = coords
+        self.mapping = mapping
+        self.cache = cache if cache is not None else ProfileCache()
+        self.signals = _ProfileSignals()
+
+    def run(self):
+        try:
+            prof = self.cache.profiles(self.volume, self.coords, mapping=self.mapping)
+        except Exception:
+            prof = None
+        self.signals.done.emit(self, prof)
+
+
+class ProfilePlot(QtWidgets.QWidget):
+    """Line plot of one tract's intensity against depth below zero (mm)."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumHeight(100)
+        self._values = None
+        self._label = ''
+
+    def set_profile(self, values: np.ndarray | None, label: str = ''):
+        self._values = None if values is None else np.asarray(values, dtype=float)
+        self._label = label
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self)
+        rect = self.rect().adjusted(30, 6, -6, -18)
+        painter.fillRect(self.rect(), QtGui.QColor('white'))
+        painter.setPen(QtGui.QColor('gray'))
+        painter.drawRect(rect)
+        vals = self._values
+        ok = None if vals is None else np.isfinite(vals)
+        if vals is None or len(vals) < 2 or not ok.any():
+            painter.drawText(self.rect(), QtCore.Qt.AlignCenter, 'Hover a tract for its profile')
+            painter.end()
+            return
+        lo, hi = float(vals[ok].min()), float(vals[ok].max())
+        if hi <= lo:
+            hi = lo + 1.0
+        n = len(vals)
+        x = rect.left() + np.arange(n) * (rect.width() / (n - 1))
+        y = rect.bottom() - (np.where(ok, vals, lo) - lo) * (rect.height() / (hi - lo))
+        painter.setPen(QtGui.QPen(QtGui.QColor('darkBlue')))
+        painter.drawPolyline(QtGui.QPolygonF([QtCore.QPointF(a, b) for a, b in zip(x, y)]))
+        painter.setPen(QtGui.QColor('black'))
+        bottom = QtCore.QRect(rect.left(), rect.bottom() + 2, rect.width(), 16)
+        painter.drawText(bottom, QtCore.Qt.AlignLeft, '0 mm')
+        painter.drawText(bottom, QtCore.Qt.AlignRight, f'{(n - 1) * MM_PER_SAMPLE:g} mm')
+        painter.drawText(bottom, QtCore.Qt.AlignHCenter, self._label)
+        painter.end()
@@ -0,0 +1,122 @@
+"""Latest-value-wins slice rendering off the GUI thread."""
+
+from collections import deque
+import time
+import numpy as np
+from PyQt5 import QtCore
+
+from tractviewer.timing import span
+from tractviewer.utils import SliceRenderer, gray_to_qimage
+
+
+class _RenderJob(QtCore.QRunnable):
+    def __init__(self, scheduler, job):
+        super().__init__()
+        self.scheduler = scheduler
+        self.job = job
+
+    def run(self):
+        key, render, generation, t_request = self.job
+        try:
+            with span('scheduler.render', 'worker'):
+                gray = render(self.scheduler._renderer)
+                img = gray_to_qimage(gray).copy()
+        except Exception:
+            img = None
+        self.scheduler._finished.emit(self.job, img)
+
+
+class RenderScheduler(QtCore.QObject):
+    """Render slices on a worker thread, coalescing requests.
+
+    At most one render runs at a time. Requests that arrive while it runs
+    replace each other, so only the newest one is rendered next and the
+    ones in between are dropped. Results go into `cache` and are announced
+    through `rendered(key, QImage)` on the GUI thread.
+
+    Input-to-pixel latency is measured from the first request a frame
+    answers to the paint that shows it (see `frame_painted`).
+    """
+
+    rendered = QtCore.pyqtSignal(object, object)
+    _finished = QtCore.pyqtSignal(object, object)
+
+    def __init__(self, cache, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.generation = 0
+        self.requested = 0
+        self.dropped = 0
+        self.latencies = deque(maxlen=500)
+        self._renderer = SliceRenderer()  # only touched by the single worker
+        self._pending = None
+        self._busy = False
+        self._first_request = None
+        self._shown_request = None
+        self.pool = QtCore.QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self._finished.connect(self._on_finished)
+
+    def request(self, key, render):
+        """Ask for a rendering; replaces any request not yet started.
+
+        `render(renderer)` is called on the worker thread with a
+        `SliceRenderer` and returns the uint8 image for `key`.
+        """
+        now = time.perf_counter()
+        self.requested += 1
+        if self._pending is not None:
+            self.dropped += 1
+        if self._first_request is None:
+            self._first_request = now
+        self._pending = (key, render, self.generation, self._first_request)
+        if not self._busy:
+            self._start()
+
+    def cancel(self):
+        """Forget pending work; results of a render in flight are ignored."""
+        self.generation += 1
+        self._pending = None
+        self._first_request = None
+
+    def shutdown(self):
+        """Cancel everything and wait for a render in flight, e.g. on close."""
+        self.cancel()
+        self.pool.clear()
+        self.pool.waitForDone()
+
+    def _start(self):
+        job, self._pending = self._pending, None
+        self._first_request = None
+        self._busy = True
+        self.pool.start(_RenderJob(self, job))
+
+    def _on_finished(self, job, img):
+        self._busy = False
+        key, _, generation, t_request = job
+        if generation == self.generation and img is not None:
+            self.cache.put(key, img)
+            self._shown_request = t_request
+            self.rendered.emit(key, img)
+        if self._pending is not None:
+            self._start()
+
+    def frame_painted(self):
+        """Record latency for the frame just painted, if it came from a request."""
+        if self._shown_request is not None:
+            self.latencies.append(time.perf_counter() - self._shown_request)
+            self._shown_request = None
+
+    def latency_stats(self) -> dict:
+        """Input-to-pixel latency in ms over the recent frames."""
+        if not self.latencies:
+            return {'frames': 0}
+        ms = np.asarray(self.latencies) * 1000.0
+        return {
+            'frames': len(ms),
+            'mean_ms': float(ms.mean()),
+            'p95_ms': float(np.percentile(ms, 95)),
+            'max_ms': float(ms.max()),
+            'requested': self.requested,
+            'dropped': self.dropped,
+        }
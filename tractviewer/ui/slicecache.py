@@ -0,0 +1,126 @@
+"""Bounded cache of rendered slices and a background prefetcher for it."""
+
+from collections import OrderedDict
+import threading
+from PyQt5 import QtCore, QtGui
+
+from tractviewer.utils import SliceRenderer, gray_to_qimage
+
+
+class SliceCache:
+    """Thread-safe LRU of rendered slice images with a memory budget in MB.
+
+    Keys are whatever the view uses to identify a rendering, e.g.
+    (slice index, window, crop). `hits` and `misses` count `get` calls so
+    the budget can be tuned.
+    """
+
+    def __init__(self, budget_mb: float = 256):
+        self.budget = int(budget_mb * 1024 * 1024)
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key) -> QtGui.QImage | None:
+        with self._lock:
+            img = self._items.get(key)
+            if img is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return img
+
+    def put(self, key, img: QtGui.QImage):
+        size = img.sizeInBytes()
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.nbytes -= old.sizeInBytes()
+            if size > self.budget:
+                return
+            self._items[key] = img
+            self.nbytes += size
+            while self.nbytes > self.budget:
+                _, dropped = self._items.popitem(last=False)
+                self.nbytes -= dropped.sizeInBytes()
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.nbytes = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': len(self._items),
+            'mb': self.nbytes / 2**20,
+        }
+
+
+class _PrefetchTask(QtCore.QRunnable):
+    def __init__(self, prefetcher, generation, jobs):
+        super().__init__()
+        self.prefetcher = prefetcher
+        self.generation = generation
+        self.jobs = jobs
+
+    def run(self):
+        renderer = SliceRenderer()
+        cache = self.prefetcher.cache
+        for key, render in self.jobs:
+            if self.generation != self.prefetcher.generation:
+                return
+            if key in cache:
+                continue
+            img = gray_to_qimage(render(renderer)).copy()
+            # cancelled while rendering: the key may now stand for another volume
+            if self.generation != self.prefetcher.generation:
+                return
+            cache.put(key, img)
+
+
+class SlicePrefetcher:
+    """Render slices into a `SliceCache` on a background thread.
+
+    Each `prefetch` call supersedes the previous one: queued work from an
+    older call stops at the next slice.
+    """
+
+    def __init__(self, cache: SliceCache):
+        self.cache = cache
+        self.generation = 0
+        self.pool = QtCore.QThreadPool()
+        self.pool.setMaxThreadCount(1)
+
+    def prefetch(self, jobs):
+        """Queue `(key, render)` jobs, nearest first.
+
+        `render(renderer)` returns the uint8 image for `key`, as for
+        `RenderScheduler.request`.
+        """
+        self.cancel()
+        jobs = [job for job in jobs if job[0] not in self.cache]
+        if jobs:
+            self.pool.start(_PrefetchTask(self, self.generation, jobs))
+
+    def cancel(self):
+        self.generation += 1
+
+    def shutdown(self):
+        """Drop queued work and wait for the slice being rendered, e.g. on close."""
+        self.cancel()
+        self.pool.clear()
+        self.pool.waitForDone()
@@ -2,25 +2,124 @@ from typing import Optional, Tuple
 import numpy as np
 from PyQt5 import QtGui
 
+from tractviewer.timing import span
+from tractviewer.volume import Volume
 
-def numpy_to_qimage(gray: np.ndarray, vlim: Optional[Tuple[int, int]]=None) -> QtGui.QImage:
-    """Convert a 2D numpy array to a QImage (RGB32 grayscale).
 
-    Note: simple implementation; can be optimized if needed.
+# integer dtypes small enough to window through a lookup table over every value
+_LUT_INDEX = {1: np.uint8, 2: np.uint16}
+
+
+def window_lut(vmin: float, vmax: float, dtype, slope: float = 1.0, inter: float = 0.0) -> np.ndarray:
+    """Build a uint8 table mapping every raw value of an 8/16-bit dtype to gray.
+
+    Raw values are scaled by `slope`/`inter` first, then [vmin, vmax] maps
+    to [0, 255]. Index it with the raw data viewed as the unsigned type of
+    the same size (see `SliceRenderer`).
+    """
+    dtype = np.dtype(dtype)
+    index = _LUT_INDEX[dtype.itemsize]
+    values = np.arange(1 << (8 * dtype.itemsize), dtype=index).view(dtype).astype(np.float32)
+    lut = np.zeros(values.shape, dtype=np.uint8)
+    if vmax > vmin:
+        k = 255.0 / (vmax - vmin)
+        values *= slope * k
+        values += (inter - vmin) * k
+        np.clip(values, 0, 255, out=values)
+        np.copyto(lut, values, casting='unsafe')
+    return lut
+
+
+class SliceRenderer:
+    """Window/level 2D slices to 8-bit gray in a reused buffer.
+
+    8- and 16-bit integer slices go through a lookup table over every raw
+    value, so changing the window only rebuilds the table. Other dtypes are
+    scaled in a float32 scratch buffer. The uint8 output buffer is reused
+    between calls, so a result is only valid until the next `render`.
+    """
+
+    def __init__(self):
+        self._out = None
+        self._scratch = None
+        self._lut = None
+        self._lut_key = None
+
+    def _buffer(self, attr: str, shape, dtype) -> np.ndarray:
+        buf = getattr(self, attr)
+        if buf is None or buf.shape != shape:
+            buf = np.empty(shape, dtype=dtype)
+            setattr(self, attr, buf)
+        return buf
+
+    def render(self, raw: np.ndarray, vlim: Tuple[float, float], slope: float = 1.0,
+               inter: float = 0.0) -> np.ndarray:
+        """Map raw values (scaled by slope/inter) in `vlim` to uint8."""
+        if raw.ndim != 2:
+            raise ValueError("SliceRenderer expects a 2D array")
+        vmin, vmax = float(vlim[0]), float(vlim[1])
+        out = self._buffer('_out', raw.shape, np.uint8)
+        if raw.dtype.kind in 'iu' and raw.dtype.itemsize in _LUT_INDEX:
+            key = (raw.dtype, vmin, vmax, slope, inter)
+            if key != self._lut_key:
+                with span('render.build_lut'):
+                    self._lut = window_lut(vmin, vmax, raw.dtype, slope, inter)
+                self._lut_key = key
+            with span('render.lut'):
+                np.take(self._lut, raw.view(_LUT_INDEX[raw.dtype.itemsize]), out=out, mode='clip')
+            return out
+        if vmax <= vmin:
+            out.fill(0)
+            return out
+        k = 255.0 / (vmax - vmin)
+        tmp = self._buffer('_scratch', raw.shape, np.float32)
+        with span('render.to_float'):
+            np.multiply(raw, slope * k, out=tmp, casting='unsafe')
+        with span('render.normalize'):
+            tmp += (inter - vmin) * k
+            np.clip(tmp, 0, 255, out=tmp)
+            np.copyto(out, tmp, casting='unsafe')
+        return out
+
+
+def render_slice(volume, idx: int, vlim: Tuple[float, float],
+                 renderer: Optional[SliceRenderer] = None) -> np.ndarray:
+    """Window slice `idx` of a `Volume` or (slices, H, W) array to uint8."""
+    if renderer is None:
+        renderer = SliceRenderer()
+    if isinstance(volume, Volume):
+        return renderer.render(volume.raw_slice(idx), vlim, volume.slope, volume.inter)
+    return renderer.render(volume[idx], vlim)
+
+
+def gray_to_qimage(gray: np.ndarray) -> QtGui.QImage:
+    """Wrap a C-contiguous 2D uint8 array as a Grayscale8 QImage without copying.
+
+    The image keeps a reference to the array, but sees any later writes to it.
+    """
+    h, w = gray.shape
+    img = QtGui.QImage(gray.data, w, h, gray.strides[0], QtGui.QImage.Format_Grayscale8)
+    img._array = gray
+    return img
+
+
+def qimage_to_gray(img: QtGui.QImage) -> np.ndarray:
+    """View the pixels of a Grayscale8 QImage as a read-only (H, W) uint8 array."""
+    h, w, bpl = img.height(), img.width(), img.bytesPerLine()
+    ptr = img.constBits()
+    ptr.setsize(h * bpl)
+    return np.frombuffer(ptr, dtype=np.uint8).reshape(h, bpl)[:, :w]
+
+
+def numpy_to_qimage(gray: np.ndarray, vlim: Optional[Tuple[int, int]]=None, hist=None) -> QtGui.QImage:
+    """Convert a 2D numpy array to a QImage (Grayscale8).
+
+    Without `vlim` the window is the range of `hist` (a `VolumeHistogram`
+    of the whole volume) or, failing that, the slice's own min and max.
     """
     if gray.ndim != 2:
         raise ValueError("numpy_to_qimage expects a 2D array")
-    arr = gray.copy()
-    if vlim is not None:
-        amin, amax = vlim
-    else:
-        amin = arr.min()
-        amax = arr.max()
-    if amax > amin:
-        arr = (arr - amin) / (amax - amin) * 255.0
-    else:
-        arr = np.zeros_like(arr)
-    arr = np.clip(arr, 0, 255).astype(np.uint8)
-    h, w = arr.shape
-    img = QtGui.QImage(arr, w, h, QtGui.QImage.Format_Grayscale8)
-    return img
+    with span('numpy_to_qimage'):
+        if vlim is None:
+            vlim = hist.range if hist is not None else (gray.min(), gray.max())
+        return gray_to_qimage(SliceRenderer().render(gray, vlim))
@@ -0,0 +1,251 @@
+"""Lazily loaded MRI volumes.
+
+The classes here expose the same (slices, H, W) orientation `load_mri` has
+always returned, but keep the data on disk: uncompressed `.nii` files are
+memory-mapped and everything else goes through nibabel's array proxy. Only
+the slice that is asked for is read and scaled.
+"""
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import TYPE_CHECKING
+import threading
+import numpy as np
+
+if TYPE_CHECKING:
+    from nibabel.arrayproxy import ArrayProxy
+
+
+class Volume(ABC):
+    """Read-only (slices, H, W) volume that reads one slice at a time.
+
+    Indexing with an int returns that slice as float32 with the NIfTI
+    `scl_slope`/`scl_inter` applied. Any other index materializes the whole
+    volume first, so `np.asarray(vol)` keeps working for code that wants it.
+    """
+
+    ndim = 3
+    dtype = np.dtype(np.float32)
+
+    def __init__(self, shape, raw_dtype, slope: float = 1.0, inter: float = 0.0, affine=None):
+        self.shape = tuple(int(s) for s in shape)
+        self.raw_dtype = np.dtype(raw_dtype)
+        self.slope = float(slope)
+        self.inter = float(inter)
+        # affine of the file on disk (not of the reoriented array)
+        self.affine = affine
+        # file the volume was loaded from, if any
+        self.source = None
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    @abstractmethod
+    def raw_slice(self, idx: int) -> np.ndarray:
+        """Return slice `idx` as stored on disk (H, W), without scaling."""
+
+    def _check_index(self, idx: int) -> int:
+        n = self.shape[0]
+        if idx < 0:
+            idx += n
+        if not 0 <= idx < n:
+            raise IndexError(f"slice index {idx} out of range for {n} slices")
+        return idx
+
+    def scale(self, raw: np.ndarray) -> np.ndarray:
+        """Apply slope/intercept to raw values, returning float32."""
+        out = raw.astype(np.float32)
+        if self.slope != 1.0:
+            out *= self.slope
+        if self.inter != 0.0:
+            out += self.inter
+        return out
+
+    def __getitem__(self, idx):
+        if isinstance(idx, (int, np.integer)):
+            return self.scale(self.raw_slice(self._check_index(int(idx))))
+        return np.asarray(self)[idx]
+
+    def __array__(self, dtype=None, copy=None):
+        out = np.empty(self.shape, dtype=np.float32)
+        for i in range(self.shape[0]):
+            out[i] = self[i]
+        if dtype is not None:
+            out = out.astype(dtype, copy=False)
+        return out
+
+
+class ArrayVolume(Volume):
+    """Volume backed by an array (usually a memmap) already in (slices, H, W)."""
+
+    def __init__(self, array: np.ndarray, slope: float = 1.0, inter: float = 0.0, affine=None):
+        if array.ndim != 3:
+            raise ValueError(f"Unsupported volume shape: {array.shape}")
+        super().__init__(array.shape, array.dtype, slope, inter, affine)
+        self.array = array
+
+    def raw_slice(self, idx: int) -> np.ndarray:
+        return np.asarray(self.array[self._check_index(idx)])
+
+
+class ProxyVolume(Volume):
+    """Volume read slice by slice through a nibabel array proxy.
+
+    Used for compressed files, which cannot be memory-mapped.
+    """
+
+    def __init__(self, proxy: 'ArrayProxy', slope: float = 1.0, inter: float = 0.0, affine=None):
+        shape = proxy.shape
+        if len(shape) not in (3, 4):
+            raise ValueError(f"Unsupported NIfTI data shape: {shape}")
+        x, y, z = shape[:3]
+        super().__init__((y, z, x), proxy.dtype, slope, inter, affine)
+        self.proxy = proxy
+        self._extra = (0,) * (len(shape) - 3)
+
+    def raw_slice(self, idx: int) -> np.ndarray:
+        idx = self._check_index(idx)
+        data = np.asarray(self.proxy[(slice(None), idx, slice(None)) + self._extra])
+        # (X, Z) on disk -> (H, W) with W reversed, matching reorient()
+        return data.T[:, ::-1]
+
+    def read_into(self, out: np.ndarray, progress=None, chunk_bytes: int = 64 << 20, step: int = 1):
+        """Stream the raw volume into `out` (slices, H, W) in on-disk order.
+
+        A slice along Y touches every Z plane of the file, so reading a
+        compressed file slice by slice decompresses it once per slice.
+        Reading contiguous chunks of Z planes decompresses it exactly once.
+        With `step`, only every step-th row and column is kept and `out` is
+        (slices, ceil(H / step), ceil(W / step)).
+        `progress`, if given, is called with the fraction done after each chunk.
+        """
+        x, y, z = self.proxy.shape[:3]
+        planes = max(1, chunk_bytes // (x * y * self.raw_dtype.itemsize))
+        # whole multiples of step, so every chunk starts on a kept row
+        planes = -(-planes // step) * step
+        for z0 in range(0, z, planes):
+            z1 = min(z, z0 + planes)
+            chunk = np.asarray(self.proxy[(slice(None), slice(None), slice(z0, z1, step)) + self._extra])
+            out[:, z0 // step:-(-z1 // step), :] = reorient(chunk)[:, :, ::step]
+            if progress is not None:
+                progress(z1 / z)
+        return out
+
+
+def reorient(arr: np.ndarray) -> np.ndarray:
+    """Reorient an on-disk (X, Y, Z[, T]) array to (slices, H, W) as a view."""
+    if arr.ndim == 4:
+        arr = arr[..., 0]
+    elif arr.ndim != 3:
+        raise ValueError(f"Unsupported NIfTI data shape: {arr.shape}")
+    return np.transpose(arr, (1, 2, 0))[:, :, ::-1]
+
+
+def open_volume(path: str | Path) -> Volume:
+    """Open a NIfTI file lazily without reading any voxel data."""
+    # nibabel takes a while to import; only pay for it once a file is opened
+    import nibabel as nib
+    from nibabel.arrayproxy import ArrayProxy
+
+    path = Path(path)
+    img = nib.load(path, keep_file_open=True)
+    proxy = img.dataobj
+    slope, inter = float(proxy.slope), float(proxy.inter)
+    if len(proxy.shape) not in (3, 4):
+        raise ValueError(f"Unsupported NIfTI data shape: {proxy.shape}")
+    if path.suffix == '.nii':
+        mm = np.memmap(path, dtype=proxy.dtype, mode='r', offset=proxy.offset,
+                       shape=proxy.shape, order=proxy.order)
+        return ArrayVolume(reorient(mm), slope, inter, img.affine)
+    # a second proxy over the same file without scaling, so that raw_slice
+    # returns on-disk values and scaling stays in Volume.scale
+    raw = ArrayProxy(proxy.file_like, (proxy.shape, proxy.dtype, proxy.offset, 1.0, 0.0),
+                     order=proxy.order, keep_file_open=True)
+    return ProxyVolume(raw, slope, inter, img.affine)
+
+
+class AxisCache:
+    """Slices along any axis of a volume, from contiguous per-axis copies.
+
+    Slicing axis 1 or 2 of a (slices, H, W) array is strided, and for a
+    memmap it touches every page of the file. So is axis 0 of a reoriented
+    `.nii` memmap, which is stored in Fortran order. `build(axis)` makes a
+    C-contiguous copy (in the raw dtype) laid out so that slices along
+    `axis` are contiguous, as long as all copies fit in `budget_mb`; the
+    least recently built copy is dropped to make room. A copy's size is
+    reserved before it is made, so concurrent builds stay within the
+    budget. Until a copy exists, slices are read strided from the volume.
+
+    Slices come out as displayed: axis 0 (H, W), axis 1 (slices, W) and
+    axis 2 (H, slices), i.e. depth is always vertical.
+    """
+
+    # transpose of (slices, H, W) that puts each axis first in display order
+    ORDER = {0: (0, 1, 2), 1: (1, 0, 2), 2: (2, 1, 0)}
+
+    def __init__(self, volume, budget_mb: float = 1024):
+        self.volume = volume
+        self.budget = int(budget_mb * 1024 * 1024)
+        if isinstance(volume, ArrayVolume):
+            self._array, self.slope, self.inter = volume.array, volume.slope, volume.inter
+        elif isinstance(volume, Volume):
+            self._array, self.slope, self.inter = None, volume.slope, volume.inter
+        else:
+            self._array, self.slope, self.inter = np.asarray(volume), 1.0, 0.0
+        self._copies = {}
+        # bytes reserved by builds in progress, per axis
+        self._building = {}
+        self._lock = threading.Lock()
+
+    @property
+    def shape(self):
+        return self.volume.shape
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in self._copies.values())
+
+    def strided(self, axis: int) -> bool:
+        """Whether slices along `axis` of the in-memory or mapped array are strided."""
+        if self._array is None:
+            return False
+        return axis != 0 or not self._array[0].flags.c_contiguous
+
+    def build(self, axis: int) -> bool:
+        """Make the contiguous copy for `axis`; returns False if over budget."""
+        size = self._array.size * self._array.dtype.itemsize if self._array is not None else 0
+        with self._lock:
+            if axis in self._copies or axis in self._building or not self.strided(axis):
+                return axis in self._copies
+            while self._copies and self.nbytes + sum(self._building.values()) + size > self.budget:
+                self._copies.pop(next(iter(self._copies)))
+            if self.nbytes + sum(self._building.values()) + size > self.budget:
+                return False
+            self._building[axis] = size
+        try:
+            copy = np.ascontiguousarray(np.transpose(self._array, self.ORDER[axis]))
+        except BaseException:
+            with self._lock:
+                self._building.pop(axis)
+            raise
+        with self._lock:
+            self._building.pop(axis)
+            self._copies[axis] = copy
+        return True
+
+    def raw_slice(self, axis: int, idx: int) -> np.ndarray:
+        """Raw slice `idx` along `axis`, oriented for display."""
+        with self._lock:
+            copy = self._copies.get(axis)
+        if copy is not None:
+            return copy[idx]
+        if axis == 0:
+            if isinstance(self.volume, Volume):
+                return self.volume.raw_slice(idx)
+            return self._array[idx]
+        if self._array is None:
+            # other lazy volumes: read every slice once for this cut
+            data = np.stack([self.volume.raw_slice(i) for i in range(self.shape[0])])
+        else:
+            data = self._array
+        return np.transpose(data, self.ORDER[axis])[idx]